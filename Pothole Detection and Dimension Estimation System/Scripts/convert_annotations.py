@@ -0,0 +1,201 @@
+"""Convert Pascal VOC annotations to YOLO label files.
+
+Replaces ``annotation_to_txt.py`` and ``convert_xml_to_yolo.py.py``:
+
+* XML files are parsed in a process pool with a streaming (iterparse) parser.
+* A manifest (``labels/.manifest.json``) records each XML file's mtime, size
+  and SHA-1, so unchanged annotations are skipped on the next run.
+* Boxes are validated against the real image size (read from the PNG/JPEG
+  header): out-of-bounds boxes are clipped, degenerate ones dropped.
+* Besides the per-image ``.txt`` files, one consolidated ``labels_index.csv``
+  with every box in the dataset is written.
+
+Usage (from the project directory)::
+
+    python Scripts/convert_annotations.py --workers 8
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import struct
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(PROJECT_DIR, 'datasets')
+CLASSES = ['pothole']
+MANIFEST_NAME = '.manifest.json'
+INDEX_NAME = 'labels_index.csv'
+
+
+def image_size(path):
+    """(width, height) from a PNG or JPEG header, or None if unknown."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(26)
+            if head[:8] == b'\x89PNG\r\n\x1a\n':
+                return struct.unpack('>II', head[16:24])
+            if head[:2] == b'\xff\xd8':
+                f.seek(2)
+                while True:
+                    marker, length = struct.unpack('>HH', f.read(4))
+                    if 0xFFC0 <= marker <= 0xFFCF and marker not in (0xFFC4, 0xFFC8, 0xFFCC):
+                        height, width = struct.unpack('>xHH', f.read(5))
+                        return width, height
+                    f.seek(length - 2, 1)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def file_digest(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def parse_voc(xml_path):
+    """Stream-parse one VOC file into (filename, (width, height), [(name, xmin, ymin, xmax, ymax)])."""
+    filename, size, objects = None, [None, None], []
+    name, box = None, {}
+    for _, elem in ET.iterparse(xml_path, events=('end',)):
+        tag = elem.tag
+        if tag == 'filename':
+            filename = (elem.text or '').strip()
+        elif tag == 'width' and name is None and not box:
+            size[0] = int(float(elem.text))
+        elif tag == 'height' and name is None and not box:
+            size[1] = int(float(elem.text))
+        elif tag == 'name':
+            name = (elem.text or '').strip()
+        elif tag in ('xmin', 'ymin', 'xmax', 'ymax'):
+            box[tag] = float(elem.text)
+        elif tag == 'object':
+            if name is not None and len(box) == 4:
+                objects.append((name, box['xmin'], box['ymin'], box['xmax'], box['ymax']))
+            name, box = None, {}
+        if tag in ('object', 'size'):
+            elem.clear()
+    return filename, tuple(size), objects
+
+
+def convert_file(task):
+    """Worker: convert one XML file and write its label file."""
+    xml_path, images_dir, labels_dir, classes = task
+    base = os.path.splitext(os.path.basename(xml_path))[0]
+    filename, (xml_w, xml_h), objects = parse_voc(xml_path)
+    filename = filename or base + '.png'
+    warnings = []
+
+    actual = image_size(os.path.join(images_dir, filename))
+    if actual is None:
+        warnings.append(f'{base}: image {filename} not found, using XML size')
+        width, height = xml_w, xml_h
+    else:
+        width, height = actual
+        if (xml_w, xml_h) != (width, height):
+            warnings.append(f'{base}: XML size {xml_w}x{xml_h} != image size {width}x{height}')
+    if not width or not height:
+        return base, filename, [], warnings + [f'{base}: unknown image size, skipped']
+
+    rows = []
+    for name, xmin, ymin, xmax, ymax in objects:
+        if name not in classes:
+            continue
+        cx1, cy1 = min(max(xmin, 0), width), min(max(ymin, 0), height)
+        cx2, cy2 = min(max(xmax, 0), width), min(max(ymax, 0), height)
+        if (cx1, cy1, cx2, cy2) != (xmin, ymin, xmax, ymax):
+            warnings.append(f'{base}: box {xmin:g},{ymin:g},{xmax:g},{ymax:g} clipped to image')
+        if cx2 <= cx1 or cy2 <= cy1:
+            warnings.append(f'{base}: degenerate box {xmin:g},{ymin:g},{xmax:g},{ymax:g} dropped')
+            continue
+        rows.append((classes.index(name), (cx1 + cx2) / 2.0 / width, (cy1 + cy2) / 2.0 / height,
+                     (cx2 - cx1) / width, (cy2 - cy1) / height))
+
+    with open(os.path.join(labels_dir, base + '.txt'), 'w') as f:
+        for class_id, x_center, y_center, w, h in rows:
+            f.write(f"{class_id} {x_center} {y_center} {w} {h}\n")
+    return base, filename, rows, warnings
+
+
+def load_manifest(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def convert_dataset(annotations_dir, images_dir, labels_dir, index_path, classes=CLASSES,
+                    workers=None, force=False):
+    """Convert every changed annotation; returns (converted, skipped, warnings)."""
+    os.makedirs(labels_dir, exist_ok=True)
+    manifest_path = os.path.join(labels_dir, MANIFEST_NAME)
+    manifest = {} if force else load_manifest(manifest_path)
+
+    current, pending = {}, []
+    for entry in os.scandir(annotations_dir):
+        if not entry.name.endswith('.xml'):
+            continue
+        stat = entry.stat()
+        previous = manifest.get(entry.name)
+        label_exists = os.path.exists(os.path.join(labels_dir, os.path.splitext(entry.name)[0] + '.txt'))
+        if previous and label_exists and previous['mtime_ns'] == stat.st_mtime_ns and previous['size'] == stat.st_size:
+            current[entry.name] = previous
+            continue
+        digest = file_digest(entry.path)
+        if previous and label_exists and previous['sha1'] == digest:
+            current[entry.name] = dict(previous, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            continue
+        current[entry.name] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': digest}
+        pending.append(entry.path)
+
+    warnings = []
+    tasks = [(path, images_dir, labels_dir, list(classes)) for path in sorted(pending)]
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for base, filename, rows, file_warnings in pool.map(convert_file, tasks, chunksize=32):
+                current[base + '.xml'].update(image=filename, boxes=[list(row) for row in rows])
+                warnings.extend(file_warnings)
+
+    # Labels of deleted annotations go away with them.
+    for name in set(manifest) - set(current):
+        stale = os.path.join(labels_dir, os.path.splitext(name)[0] + '.txt')
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    with open(manifest_path, 'w') as f:
+        json.dump(current, f)
+    with open(index_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['image', 'class_id', 'x_center', 'y_center', 'width', 'height'])
+        for name in sorted(current):
+            for row in current[name].get('boxes', []):
+                writer.writerow([current[name]['image']] + row)
+
+    return len(pending), len(current) - len(pending), warnings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert VOC XML annotations to YOLO labels.')
+    parser.add_argument('--annotations', default=os.path.join(DATASET_DIR, 'annotations'))
+    parser.add_argument('--images', default=os.path.join(DATASET_DIR, 'images'))
+    parser.add_argument('--labels', default=os.path.join(DATASET_DIR, 'labels'))
+    parser.add_argument('--index', default=os.path.join(DATASET_DIR, INDEX_NAME))
+    parser.add_argument('--classes', nargs='+', default=CLASSES)
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='ignore the manifest and convert everything')
+    args = parser.parse_args(argv)
+
+    converted, skipped, warnings = convert_dataset(
+        args.annotations, args.images, args.labels, args.index, args.classes, args.workers, args.force)
+    for warning in warnings:
+        print(f'WARNING: {warning}')
+    print(f'Converted {converted} annotation(s), {skipped} unchanged')
+
+
+if __name__ == '__main__':
+    main()
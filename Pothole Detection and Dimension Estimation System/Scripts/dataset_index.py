@@ -0,0 +1,183 @@
+"""Index the dataset, find duplicate images and write train/val/test splits.
+
+* Every image gets an exact hash (SHA-1 of the file) and a 64-bit perceptual
+  difference hash (dHash). Files whose dHashes differ in at most
+  ``--max-distance`` bits are near-duplicates.
+* Duplicate clusters always land in the same split, so validation never
+  re-scores a copy of a training image.
+* Each cluster's split comes from its SHA-1, so assignments are deterministic
+  and stay put when new images are added.
+* Split lists (``datasets/{train,val,test}.txt``) and a portable dataset YAML
+  with relative paths are written.
+* Hashes are cached in ``datasets/cache/dataset_index.json`` by mtime and
+  size, so re-running on an unchanged dataset only stats the files.
+
+Usage (from the project directory)::
+
+    python Scripts/dataset_index.py --val 0.1 --test 0.1
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(PROJECT_DIR, 'datasets')
+INDEX_PATH = os.path.join(DATASET_DIR, 'cache', 'dataset_index.json')
+YAML_PATH = os.path.join(PROJECT_DIR, 'pothole_detection.yaml')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+SPLITS = ('train', 'val', 'test')
+
+# Bits set in each byte value, for Hamming distances between packed hashes.
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def dhash(path, size=8):
+    """64-bit difference hash of the grayscale image, or None if unreadable."""
+    image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return None
+    small = cv2.resize(image, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def sha1_of(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def update_index(images_dir, index_path=INDEX_PATH):
+    """Hash new or modified images; returns (index, number of files hashed)."""
+    cached = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            cached = json.load(f)
+
+    index, hashed = {}, 0
+    for entry in sorted(os.scandir(images_dir), key=lambda e: e.name):
+        if not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        stat = entry.stat()
+        previous = cached.get(entry.name)
+        if previous and previous['mtime_ns'] == stat.st_mtime_ns and previous['size'] == stat.st_size:
+            index[entry.name] = previous
+            continue
+        index[entry.name] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                             'sha1': sha1_of(entry.path), 'dhash': dhash(entry.path)}
+        hashed += 1
+
+    if hashed or len(index) != len(cached):
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with open(index_path, 'w') as f:
+            json.dump(index, f)
+    return index, hashed
+
+
+def duplicate_clusters(index, max_distance=4):
+    """Union exact and perceptual duplicates; returns a list of name clusters."""
+    names = sorted(index)
+    parent = list(range(len(names)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    by_sha = {}
+    for i, name in enumerate(names):
+        first = by_sha.setdefault(index[name]['sha1'], i)
+        if first != i:
+            union(first, i)
+
+    hashed = [i for i, name in enumerate(names) if index[name]['dhash'] is not None]
+    if max_distance >= 0 and len(hashed) > 1:
+        codes = np.array([index[names[i]]['dhash'] for i in hashed], dtype='>u8').view(np.uint8).reshape(-1, 8)
+        # Compare in row blocks to keep the distance matrix small.
+        for start in range(0, len(codes), 1024):
+            block = codes[start:start + 1024]
+            distance = POPCOUNT[block[:, None, :] ^ codes[None, :, :]].sum(axis=2, dtype=np.int32)
+            rows, cols = np.nonzero(distance <= max_distance)
+            for r, c in zip(rows + start, cols):
+                if r < c:
+                    union(hashed[r], hashed[c])
+
+    clusters = {}
+    for i, name in enumerate(names):
+        clusters.setdefault(find(i), []).append(name)
+    return list(clusters.values())
+
+
+def assign_splits(index, clusters, val=0.1, test=0.1):
+    """Deterministically map each cluster to a split from its smallest SHA-1."""
+    splits = {split: [] for split in SPLITS}
+    for cluster in clusters:
+        key = min(index[name]['sha1'] for name in cluster)
+        u = int(key[:12], 16) / float(1 << 48)
+        split = 'test' if u < test else 'val' if u < test + val else 'train'
+        splits[split].extend(cluster)
+    return {split: sorted(names) for split, names in splits.items()}
+
+
+def write_splits(splits, dataset_dir=DATASET_DIR, images_subdir='images'):
+    for split, names in splits.items():
+        with open(os.path.join(dataset_dir, f'{split}.txt'), 'w') as f:
+            # "./" entries are resolved relative to the list file by ultralytics.
+            f.writelines(f'./{images_subdir}/{name}\n' for name in names)
+
+
+def write_yaml(yaml_path=YAML_PATH, dataset_dir=DATASET_DIR, names=('pothole',)):
+    rel = os.path.relpath(dataset_dir, os.path.dirname(os.path.abspath(yaml_path))).replace(os.sep, '/')
+    with open(yaml_path, 'w') as f:
+        f.write('# Generated by Scripts/dataset_index.py.\n')
+        # No "path:" key, so ultralytics takes the dataset root from the
+        # directory of the YAML path it was given. That is this file's
+        # directory only for an absolute path; a relative one (and a relative
+        # "path:") is resolved against its global datasets_dir instead.
+        f.write('# Split paths are relative to this file only when it is passed by absolute\n')
+        f.write('# path, as Scripts/train_yolov8.py does. "yolo train data=pothole_detection.yaml"\n')
+        f.write('# resolves them against the ultralytics datasets_dir setting instead.\n')
+        for split in SPLITS:
+            f.write(f'{split}: {rel}/{split}.txt\n')
+        f.write(f'nc: {len(names)}\n')
+        f.write(f'names: {json.dumps(list(names))}\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Deduplicate the dataset and write train/val/test splits.')
+    parser.add_argument('--dataset', default=DATASET_DIR)
+    parser.add_argument('--index', default=INDEX_PATH)
+    parser.add_argument('--yaml', default=YAML_PATH)
+    parser.add_argument('--val', type=float, default=0.1)
+    parser.add_argument('--test', type=float, default=0.1)
+    parser.add_argument('--max-distance', type=int, default=4,
+                        help='max dHash Hamming distance for near-duplicates (-1 for exact only)')
+    args = parser.parse_args(argv)
+
+    index, hashed = update_index(os.path.join(args.dataset, 'images'), args.index)
+    clusters = duplicate_clusters(index, args.max_distance)
+    splits = assign_splits(index, clusters, args.val, args.test)
+    write_splits(splits, args.dataset)
+    write_yaml(args.yaml, args.dataset)
+
+    duplicates = [sorted(c) for c in clusters if len(c) > 1]
+    print(f'Indexed {len(index)} images ({hashed} hashed), {len(duplicates)} duplicate cluster(s)')
+    for cluster in duplicates:
+        print('  duplicates: ' + ', '.join(cluster))
+    print('Split sizes: ' + ', '.join(f'{split}={len(names)}' for split, names in splits.items()))
+
+
+if __name__ == '__main__':
+    main()
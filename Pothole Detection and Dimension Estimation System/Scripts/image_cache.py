@@ -0,0 +1,203 @@
+"""Pre-decoded, memory-mapped image cache for YOLO training.
+
+With ``cache: false`` every epoch decodes every PNG again. This script decodes
+each image once, resizes it the way ultralytics' ``load_image`` does (long
+side = ``imgsz``, aspect kept) and packs all pixels into one uint8 file::
+
+    datasets/cache/images_640.u8      raw pixels, images back to back
+    datasets/cache/images_640.npy     index: file, offset, resized/original shape, mtime, size
+
+The file is opened read-only with ``np.memmap``, so dataloader workers and
+concurrent training processes share one copy through the OS page cache.
+``CachedDetectionTrainer`` makes ultralytics read from it.
+
+Usage (from the project directory)::
+
+    python Scripts/image_cache.py --imgsz 640
+"""
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(PROJECT_DIR, 'datasets')
+CACHE_DIR = os.path.join(DATASET_DIR, 'cache')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+INDEX_DTYPE = np.dtype([
+    ('name', 'U128'),
+    ('offset', '<i8'),
+    ('h', '<i4'), ('w', '<i4'),
+    ('h0', '<i4'), ('w0', '<i4'),
+    ('mtime_ns', '<i8'),
+    ('size', '<i8'),
+])
+
+
+def cache_paths(cache_dir, imgsz):
+    base = os.path.join(cache_dir, f'images_{imgsz}')
+    return base + '.u8', base + '.npy'
+
+
+def resize_long_side(image, imgsz):
+    """Same resize as ultralytics ``BaseDataset.load_image`` in rect mode."""
+    h0, w0 = image.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = min(int(np.ceil(w0 * r)), imgsz), min(int(np.ceil(h0 * r)), imgsz)
+        image = cv2.resize(image, (w, h), interpolation=cv2.INTER_LINEAR)
+    return image
+
+
+def list_images(images_dir):
+    entries = (e for e in os.scandir(images_dir) if e.name.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(entries, key=lambda e: e.name)
+
+
+def is_stale(images_dir, cache_dir, imgsz):
+    """True if the cache is missing or any image was added, removed or modified."""
+    data_path, index_path = cache_paths(cache_dir, imgsz)
+    if not (os.path.exists(data_path) and os.path.exists(index_path)):
+        return True
+    index = np.load(index_path)
+    entries = list_images(images_dir)
+    if len(entries) != len(index):
+        return True
+    for entry, row in zip(entries, index):
+        stat = entry.stat()
+        if entry.name != row['name'] or stat.st_mtime_ns != row['mtime_ns'] or stat.st_size != row['size']:
+            return True
+    return False
+
+
+def build_cache(images_dir, cache_dir, imgsz=640, workers=None):
+    """Decode, resize and pack every image; returns the number of images cached."""
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path, index_path = cache_paths(cache_dir, imgsz)
+    entries = list_images(images_dir)
+
+    def load(entry):
+        image = cv2.imread(entry.path)
+        if image is None:
+            return entry, None, None
+        return entry, image.shape[:2], resize_long_side(image, imgsz)
+
+    index = np.zeros(len(entries), dtype=INDEX_DTYPE)
+    offset = 0
+    tmp_path = data_path + '.tmp'
+    with open(tmp_path, 'wb') as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        # cv2 releases the GIL while decoding, so threads decode in parallel.
+        for i, (entry, shape0, image) in enumerate(pool.map(load, entries)):
+            stat = entry.stat()
+            row = index[i]
+            row['name'], row['mtime_ns'], row['size'] = entry.name, stat.st_mtime_ns, stat.st_size
+            row['offset'] = -1
+            if image is None:
+                continue
+            image = np.ascontiguousarray(image, dtype=np.uint8)
+            row['offset'] = offset
+            row['h'], row['w'] = image.shape[:2]
+            row['h0'], row['w0'] = shape0
+            f.write(image.tobytes())
+            offset += image.nbytes
+    os.replace(tmp_path, data_path)
+    np.save(index_path, index)
+    return int((index['offset'] >= 0).sum())
+
+
+class ImageCache:
+    """Read-only view over a packed cache; only paths are pickled to workers."""
+
+    def __init__(self, cache_dir, imgsz):
+        self.cache_dir = cache_dir
+        self.imgsz = imgsz
+        self._data = None
+        self._rows = None
+
+    def _open(self):
+        data_path, index_path = cache_paths(self.cache_dir, self.imgsz)
+        index = np.load(index_path)
+        self._data = np.memmap(data_path, dtype=np.uint8, mode='r')
+        self._rows = {row['name']: row for row in index if row['offset'] >= 0}
+
+    def __getstate__(self):
+        return {'cache_dir': self.cache_dir, 'imgsz': self.imgsz, '_data': None, '_rows': None}
+
+    def get(self, path):
+        """(image copy, (h0, w0)) for a cached file, or None."""
+        if self._data is None:
+            self._open()
+        row = self._rows.get(os.path.basename(path))
+        if row is None:
+            return None
+        h, w = int(row['h']), int(row['w'])
+        start = int(row['offset'])
+        # Copy out of the shared mapping: augmentations modify images in place.
+        image = np.array(self._data[start:start + h * w * 3]).reshape(h, w, 3)
+        return image, (int(row['h0']), int(row['w0']))
+
+
+try:
+    from ultralytics.data.dataset import YOLODataset
+    from ultralytics.models.yolo.detect import DetectionTrainer
+except ImportError:  # building the cache does not need ultralytics
+    YOLODataset = DetectionTrainer = None
+
+if YOLODataset is not None:
+    class CachedYOLODataset(YOLODataset):
+        """YOLODataset whose ``load_image`` reads from an :class:`ImageCache`."""
+
+        image_cache = None
+
+        def load_image(self, i, rect_mode=True):
+            if self.ims[i] is not None:
+                return super().load_image(i, rect_mode)
+            cached = self.image_cache.get(self.im_files[i]) if (self.image_cache and rect_mode) else None
+            if cached is None:
+                return super().load_image(i, rect_mode)
+            image, hw0 = cached
+            if self.augment:
+                # Same bookkeeping as BaseDataset.load_image: Mosaic samples its
+                # extra images from self.buffer, which is capped at max_buffer_length.
+                self.ims[i], self.im_hw0[i], self.im_hw[i] = image, hw0, image.shape[:2]
+                self.buffer.append(i)
+                if len(self.buffer) >= self.max_buffer_length:
+                    j = self.buffer.pop(0)
+                    self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+            return image, hw0, image.shape[:2]
+
+    class CachedDetectionTrainer(DetectionTrainer):
+        """DetectionTrainer that serves images from the memory-mapped cache."""
+
+        cache_dir = CACHE_DIR
+
+        def build_dataset(self, img_path, mode='train', batch=None):
+            dataset = super().build_dataset(img_path, mode, batch)
+            if self.cache_dir and isinstance(dataset, YOLODataset):
+                dataset.__class__ = CachedYOLODataset
+                dataset.image_cache = ImageCache(self.cache_dir, dataset.imgsz)
+            return dataset
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the memory-mapped training image cache.')
+    parser.add_argument('--images', default=os.path.join(DATASET_DIR, 'images'))
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='rebuild even if the cache is up to date')
+    args = parser.parse_args(argv)
+
+    if not args.force and not is_stale(args.images, args.cache_dir, args.imgsz):
+        print('Image cache is up to date')
+        return
+    count = build_cache(args.images, args.cache_dir, args.imgsz, args.workers)
+    data_path, _ = cache_paths(args.cache_dir, args.imgsz)
+    print(f'Cached {count} images in {data_path} ({os.path.getsize(data_path) / 1e6:.1f} MB)')
+
+
+if __name__ == '__main__':
+    main()
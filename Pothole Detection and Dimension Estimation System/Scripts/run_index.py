@@ -0,0 +1,196 @@
+"""Index and query training runs under ``runs/``.
+
+Each ultralytics run directory holds ``args.yaml`` and ``results.csv``. This
+tool folds them into one cached index (``runs/.run_index.json``) and answers
+cross-run questions from it. The update is incremental:
+
+* Runs whose files are unchanged (same mtime and size) are skipped.
+* A ``results.csv`` that only grew is read from the last indexed byte.
+* Runs that disappeared are dropped.
+
+Usage (from the project directory)::
+
+    python Scripts/run_index.py list
+    python Scripts/run_index.py best --group-by model imgsz batch
+    python Scripts/run_index.py epoch-times
+"""
+import argparse
+import csv
+import io
+import json
+import os
+
+import yaml
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS_DIR = os.path.join(PROJECT_DIR, 'runs')
+INDEX_NAME = '.run_index.json'
+INDEX_VERSION = 1
+DEFAULT_METRIC = 'metrics/mAP50-95(B)'
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def find_runs(runs_dir):
+    """Every directory below ``runs_dir`` containing a results.csv or args.yaml."""
+    for root, dirs, files in os.walk(runs_dir):
+        dirs[:] = [d for d in dirs if d != 'weights']
+        if 'results.csv' in files or 'args.yaml' in files:
+            yield os.path.relpath(root, runs_dir).replace(os.sep, '/')
+
+
+def _read_results(path, run, start):
+    """Read results.csv from byte ``start``; returns (columns, new rows, end offset)."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read()
+    # Only consume complete lines; a run being written may have a partial one.
+    complete = data[:data.rfind(b'\n') + 1]
+    end = start + len(complete)
+    reader = csv.reader(io.StringIO(complete.decode()))
+    columns = run.get('columns') if start else None
+    rows = []
+    for line in reader:
+        if not line:
+            continue
+        if columns is None:
+            columns = [c.strip() for c in line]
+            continue
+        rows.append([_parse_float(v.strip()) for v in line])
+    return columns or [], rows, end
+
+
+def _index_run(run_dir, run):
+    """Refresh one run entry in place; returns True if anything was re-read."""
+    changed = False
+    args_path = os.path.join(run_dir, 'args.yaml')
+    args_stat = _stat(args_path)
+    if args_stat != run.get('args_stat'):
+        run['args'] = {}
+        if args_stat:
+            with open(args_path) as f:
+                run['args'] = yaml.safe_load(f) or {}
+        run['args_stat'] = args_stat
+        changed = True
+
+    results_path = os.path.join(run_dir, 'results.csv')
+    results_stat = _stat(results_path)
+    if results_stat != run.get('results_stat'):
+        offset = run.get('results_offset', 0)
+        if not results_stat or results_stat[1] < offset:
+            offset = 0  # truncated or rewritten: start over
+        if offset == 0:
+            run['rows'] = []
+        if results_stat:
+            columns, rows, offset = _read_results(results_path, run, offset)
+            run['columns'] = columns
+            run['rows'] = run.get('rows', []) + rows
+        run['results_offset'] = offset
+        run['results_stat'] = results_stat
+        changed = True
+
+    run['tfevents'] = sorted(f for f in os.listdir(run_dir) if f.startswith('events.out.tfevents'))
+    return changed
+
+
+def update_index(runs_dir=RUNS_DIR):
+    """Load the cached index, refresh changed runs and save it back."""
+    index_path = os.path.join(runs_dir, INDEX_NAME)
+    index = {'version': INDEX_VERSION, 'runs': {}}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            cached = json.load(f)
+        if cached.get('version') == INDEX_VERSION:
+            index = cached
+
+    found = set(find_runs(runs_dir)) if os.path.isdir(runs_dir) else set()
+    changed = bool(set(index['runs']) - found)
+    index['runs'] = {name: run for name, run in index['runs'].items() if name in found}
+    for name in sorted(found):
+        run = index['runs'].setdefault(name, {})
+        changed |= _index_run(os.path.join(runs_dir, name), run)
+
+    if changed:
+        with open(index_path, 'w') as f:
+            json.dump(index, f)
+    return index
+
+
+def column(run, name):
+    """Values of one results column (None where missing)."""
+    try:
+        i = run['columns'].index(name)
+    except (KeyError, ValueError):
+        return []
+    return [row[i] if i < len(row) else None for row in run['rows']]
+
+
+def epoch_times(run):
+    """Per-epoch wall time: the runner's train_epoch_s, else diffs of cumulative ``time``."""
+    direct = column(run, 'throughput/train_epoch_s')
+    if any(v is not None for v in direct):
+        return direct
+    cumulative = column(run, 'time')
+    return [b - a if None not in (a, b) else None for a, b in zip([0.0] + cumulative[:-1], cumulative)]
+
+
+def best_by_config(index, metric=DEFAULT_METRIC, group_by=('model', 'imgsz', 'batch', 'epochs')):
+    """Best value of ``metric`` per configuration (tuple of ``group_by`` args)."""
+    best = {}
+    for name, run in index['runs'].items():
+        values = column(run, metric)
+        scored = [(v, epoch) for epoch, v in enumerate(values, 1) if v is not None]
+        if not scored:
+            continue
+        value, epoch = max(scored)
+        key = tuple(run.get('args', {}).get(k) for k in group_by)
+        if key not in best or value > best[key]['value']:
+            best[key] = {'run': name, 'epoch': epoch, 'value': value}
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query training runs.')
+    parser.add_argument('--runs', default=RUNS_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='one line per indexed run')
+    best = sub.add_parser('best', help='best metric per configuration')
+    best.add_argument('--metric', default=DEFAULT_METRIC)
+    best.add_argument('--group-by', nargs='+', default=['model', 'imgsz', 'batch', 'epochs'])
+    sub.add_parser('epoch-times', help='epoch wall time trend per run')
+    args = parser.parse_args(argv)
+
+    index = update_index(args.runs)
+    runs = sorted(index['runs'].items(), key=lambda item: (item[1].get('results_stat') or [0])[0])
+
+    if args.command == 'list':
+        for name, run in runs:
+            print(f"{name}: {len(run.get('rows', []))} epochs, data={run.get('args', {}).get('data')}")
+    elif args.command == 'best':
+        print(' | '.join(args.group_by) + f' -> best {args.metric}')
+        results = best_by_config(index, args.metric, args.group_by)
+        for key, result in sorted(results.items(), key=lambda item: -item[1]['value']):
+            print(f"{' | '.join(map(str, key))} -> {result['value']:.5f} ({result['run']}, epoch {result['epoch']})")
+    elif args.command == 'epoch-times':
+        for name, run in runs:
+            times = [t for t in epoch_times(run) if t is not None]
+            if times:
+                print(f'{name}: {len(times)} epochs, first {times[0]:.1f}s, last {times[-1]:.1f}s, '
+                      f'mean {sum(times) / len(times):.1f}s, max {max(times):.1f}s')
+
+
+if __name__ == '__main__':
+    main()
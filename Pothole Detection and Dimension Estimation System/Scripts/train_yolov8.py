@@ -1,13 +1,184 @@
+"""Train the pothole detector from a config file.
+
+Usage (from the project directory)::
+
+    python Scripts/train_yolov8.py --config train_config.yaml
+    python Scripts/train_yolov8.py --config train_config.yaml --resume
+
+``batch: auto`` and ``workers: auto`` are sized from the available CPU cores
+and RAM (ultralytics AutoBatch is used on CUDA). On CPU the per-image memory
+footprint is measured with a short probe unless ``bytes_per_image`` is set. Every epoch, images/sec,
+dataloader wait time and train wall time are appended to the run's
+``results.csv`` next to the usual metrics.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import yaml
 from ultralytics import YOLO
 
-model = YOLO('src/models/yolov8n.yaml', task='detect')
+from image_cache import CACHE_DIR, DATASET_DIR, CachedDetectionTrainer, build_cache, is_stale
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG = os.path.join(PROJECT_DIR, 'train_config.yaml')
+DEFAULT_MODEL = 'src/models/yolov8n.yaml'
+
+# Keys consumed by this runner; everything else goes to ``model.train``.
+RUNNER_KEYS = ('model', 'image_cache', 'bytes_per_image')
+
+
+def available_memory():
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+
+
+def auto_workers(cpu_count=None):
+    """Leave one core for the training loop itself."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(0, min(cpu_count - 1, 8))
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # kilobytes on Linux
+
+
+def probe_bytes_per_image(model_cfg, imgsz, batches=(2, 4), steps=2):
+    """Training memory of one image, measured from the growth of peak RSS.
+
+    Runs a few forward/backward steps on random images at two batch sizes;
+    the extra peak RSS of the larger batch divided by its extra images is
+    the footprint of activations and gradients per image.
+    """
+    import torch
+    model = YOLO(model_cfg, task='detect').model.train()
+    peaks = []
+    for batch in batches:
+        for _ in range(steps):
+            model.zero_grad(set_to_none=True)
+            sum(output.sum() for output in model(torch.rand(batch, 3, imgsz, imgsz))).backward()
+        peaks.append(peak_rss())
+    return max((peaks[1] - peaks[0]) / (batches[1] - batches[0]), 1)
+
+
+def auto_batch(imgsz, memory=None, per_image=None, model_cfg=None):
+    """Largest power-of-two batch that fits in half the available RAM.
+
+    ``per_image`` is the training footprint of one image in bytes; it is
+    measured with :func:`probe_bytes_per_image` on ``model_cfg`` if not given.
+    """
+    import torch
+    if torch.cuda.is_available():
+        return -1  # ultralytics AutoBatch sizes against GPU memory
+    memory = memory or available_memory()
+    if per_image is None:
+        per_image = probe_bytes_per_image(model_cfg, imgsz)
+    batch = 4
+    while batch * 2 * per_image <= memory / 2 and batch < 64:
+        batch *= 2
+    return batch
+
+
+class ThroughputTrainer(CachedDetectionTrainer):
+    """Adds per-epoch throughput and dataloader wait columns to results.csv."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.throughput = {}
+        self.add_callback('on_train_epoch_start', self._epoch_start)
+        self.add_callback('on_train_batch_start', self._batch_start)
+        self.add_callback('on_train_batch_end', self._batch_end)
+        self.add_callback('on_train_epoch_end', self._epoch_end)
+
+    @staticmethod
+    def _epoch_start(trainer):
+        trainer._epoch_t0 = trainer._last_batch_end = time.perf_counter()
+        trainer._data_wait = 0.0
+
+    @staticmethod
+    def _batch_start(trainer):
+        # Time since the previous step finished was spent waiting on the dataloader.
+        trainer._data_wait += time.perf_counter() - trainer._last_batch_end
+
+    @staticmethod
+    def _batch_end(trainer):
+        trainer._last_batch_end = time.perf_counter()
+
+    @staticmethod
+    def _epoch_end(trainer):
+        elapsed = time.perf_counter() - trainer._epoch_t0
+        images = len(trainer.train_loader.dataset)
+        trainer.throughput = {
+            'throughput/images_per_sec': round(images / elapsed, 3) if elapsed else 0.0,
+            'throughput/dataloader_wait_s': round(trainer._data_wait, 3),
+            'throughput/train_epoch_s': round(elapsed, 3),
+        }
+
+    def save_metrics(self, metrics):
+        super().save_metrics({**metrics, **self.throughput})
+
+
+def load_config(path):
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def last_checkpoint(config):
+    """Most recent last.pt among ``<name>``, ``<name>2``, ... (ultralytics numbers repeat runs)."""
+    project = config.get('project') or os.path.join('runs', 'detect')
+    name = config.get('name', 'train')
+    candidates = glob.glob(os.path.join(project, glob.escape(name) + '*', 'weights', 'last.pt'))
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the pothole detector.')
+    parser.add_argument('--config', default=DEFAULT_CONFIG)
+    parser.add_argument('--resume', action='store_true', help="continue from the run's last.pt")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    train_args = {k: v for k, v in config.items() if k not in RUNNER_KEYS}
+    if 'data' in train_args and not os.path.isabs(train_args['data']):
+        # Absolute, so ultralytics resolves the YAML's split paths against its directory.
+        train_args['data'] = os.path.join(os.path.dirname(os.path.abspath(args.config)), train_args['data'])
+    imgsz = train_args.setdefault('imgsz', 640)
+    if train_args.get('workers', 'auto') == 'auto':
+        train_args['workers'] = auto_workers()
+    if train_args.get('batch', 'auto') == 'auto':
+        per_image = config.get('bytes_per_image', 'auto')
+        train_args['batch'] = auto_batch(imgsz, per_image=None if per_image == 'auto' else float(per_image),
+                                         model_cfg=config.get('model', DEFAULT_MODEL))
+
+    trainer = ThroughputTrainer
+    if config.get('image_cache', True):
+        # Decode and resize the dataset once; epochs then read from the memory-mapped cache.
+        images_dir = os.path.join(DATASET_DIR, 'images')
+        if is_stale(images_dir, CACHE_DIR, imgsz):
+            build_cache(images_dir, CACHE_DIR, imgsz)
+    else:
+        ThroughputTrainer.cache_dir = None
+
+    if args.resume:
+        checkpoint = last_checkpoint(train_args)
+        if checkpoint is None:
+            parser.error(f"no last.pt to resume from for run '{train_args.get('name')}'")
+        print(f'Resuming from {checkpoint}')
+        YOLO(checkpoint).train(resume=True, trainer=trainer)
+        return
 
+    print(f"Training with batch={train_args['batch']} workers={train_args['workers']} imgsz={imgsz}")
+    model = YOLO(config.get('model', DEFAULT_MODEL), task='detect')
+    model.train(trainer=trainer, **train_args)
 
 
-model.train(
-    data='pothole_detection.yaml',  
-    epochs=50,                      
-    imgsz=640,                      
-    batch=16,                       
-    name='pothole_detection'        
-)
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,6 @@ from ultralytics import YOLO
 import cv2
 import numpy as np
 import torch
-from deep_sort_realtime.deepsort_tracker import DeepSort
 from flask import Flask, Response, jsonify, send_from_directory
 from flask_cors import CORS
 import threading
@@ -12,6 +11,13 @@ import base64
 from typing import Dict, Tuple, Optional
 import logging
 import os
+import sys
+
+# Shared pipeline components live with the backend service.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+from inference.adapters import StreamSession, video_engine
+from inference.calibration import CAMERA_PROFILE, get_profile, load_profiles
+from inference.engine import MidasDepth, YoloDetector
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -29,7 +35,6 @@ class VideoProcessorState:
         self.processing_active = False
         self.global_pothole_data: Dict[int, Tuple[float, float, float]] = {}
         self.id_mapping: Dict[str, int] = {}
-        self.global_track_id = 1
         self.lock = threading.Lock()
         self.encoded_frame = None  # Store base64 encoded frame
 
@@ -37,28 +42,20 @@ state = VideoProcessorState()
 
 # Model initialization
 def initialize_models():
-    """Initialize YOLO, DeepSORT, and MiDaS models."""
+    """Initialize the YOLO detector and MiDaS depth backends."""
     try:
         # Load YOLO model
-        yolo_model = YOLO("models/best.pt", task="detect")
-        
-        # Initialize DeepSORT tracker
-        tracker = DeepSort(max_age=30, max_iou_distance=0.3)
+        detector = YoloDetector(YOLO("models/best.pt", task="detect"), tiled="off")
         
         # Load MiDaS depth estimation model
-        midas = torch.hub.load("intel-isl/MiDaS", "DPT_Hybrid")
-        midas_transforms = torch.hub.load("intel-isl/MiDaS", "transforms").small_transform
-        
-        # Set device and move model to it
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        midas.to(device).eval()
+        depth_model = MidasDepth.load("DPT_Hybrid")
         
-        return yolo_model, tracker, midas, midas_transforms, device
+        return detector, depth_model
     except Exception as e:
         logger.error(f"Model initialization failed: {e}")
         raise
 
-model, tracker, midas, midas_transforms, device = initialize_models()
+detector, depth_model = initialize_models()
 
 def resize_frame(frame: np.ndarray, max_w: int, max_h: int) -> np.ndarray:
     """Resize frame while maintaining aspect ratio."""
@@ -66,9 +63,8 @@ def resize_frame(frame: np.ndarray, max_w: int, max_h: int) -> np.ndarray:
     scale = min(max_w / w, max_h / h)
     return cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
 
-def convert_to_real_world(pixels: float, conversion_factor: float = 0.035) -> float:
-    """Convert pixel measurements to real-world centimeters."""
-    return pixels * conversion_factor
+# Camera profile used for pixel -> centimeter conversion (see backend/cameras.json)
+camera_profile = get_profile(CAMERA_PROFILE, load_profiles())
 
 def encode_frame_to_base64(frame):
     """Convert frame to base64 for sending to frontend."""
@@ -78,7 +74,7 @@ def encode_frame_to_base64(frame):
 
 def process_video(video_path: str) -> None:
     """Process video to detect and track potholes with depth estimation."""
-    global state, tracker
+    global state
     
     with state.lock:
         if state.processing_active:
@@ -87,7 +83,6 @@ def process_video(video_path: str) -> None:
         state.processing_active = True
         state.global_pothole_data.clear()
         state.id_mapping.clear()
-        state.global_track_id = 1
     
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
@@ -95,9 +90,11 @@ def process_video(video_path: str) -> None:
         state.processing_active = False
         return
 
-    pothole_data: Dict[int, Tuple[float, float, float]] = {}
-    pothole_depths: Dict[int, list] = {}
-    scaling_factor = 1  # Reduce bounding box size to 80% of original
+    # Tracker: DeepSORT by default, TRACKER_BACKEND=iou for the NumPy tracker.
+    # The session saves finished potholes into state.global_pothole_data and
+    # keeps global IDs across the tracker resets on blackout frames.
+    engine = video_engine(detector, camera_profile, depth_model)
+    session = StreamSession(engine, state.global_pothole_data, state.id_mapping)
 
     while cap.isOpened() and state.processing_active:
         ret, frame = cap.read()
@@ -105,101 +102,24 @@ def process_video(video_path: str) -> None:
             logger.info("End of video or error encountered.")
             break
 
-        results = model(frame)
-        if len(results[0].boxes) == 0:
+        result = engine.process_frame(frame, skip_empty=True)
+        with state.lock:
+            frame_data = session.record(result)
+        if frame_data is None:
             logger.info("Blackout frame detected. Resetting tracker.")
-            with state.lock:
-                # Save current pothole data into the global dictionary
-                for track_id, (length_real, breadth_real, fixed_depth) in pothole_data.items():
-                    if track_id not in state.global_pothole_data:
-                        state.global_pothole_data[track_id] = (length_real, breadth_real, fixed_depth)
-                
-            # Reset tracker but maintain global_track_id
-            tracker = DeepSort(max_age=30, max_iou_distance=0.3)
-            pothole_data.clear()
-            pothole_depths.clear()
             time.sleep(0.03)
             continue
 
-        # Depth estimation
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        input_batch = midas_transforms(frame_rgb).to(device)
-        with torch.no_grad():
-            prediction = midas(input_batch)
-            prediction = torch.nn.functional.interpolate(
-                prediction.unsqueeze(1), size=frame.shape[:2], mode="bicubic", align_corners=False
-            ).squeeze()
-        depth_map = prediction.cpu().numpy()
-
-        # Prepare detections for tracker with reduced bounding box size
-        detections = []
-        for result in results:
-            for box in result.boxes:
-                x_min, y_min, x_max, y_max = [int(x) for x in box.xyxy[0].tolist()]
-                conf = float(box.conf[0])
-                
-                # Calculate original width and height
-                w = x_max - x_min
-                h = y_max - y_min
-                
-                # Reduce width and height by scaling factor
-                new_w = int(w * scaling_factor)
-                new_h = int(h * scaling_factor)
-                
-                # Recalculate coordinates to keep the box centered
-                center_x = x_min + w // 2
-                center_y = y_min + h // 2
-                new_x_min = max(0, center_x - new_w // 2)
-                new_y_min = max(0, center_y - new_h // 2)
-                new_x_max = min(frame.shape[1], new_x_min + new_w)
-                new_y_max = min(frame.shape[0], new_y_min + new_h)
-                
-                # Update detections with new coordinates - using ltwh format for DeepSORT
-                detections.append(([new_x_min, new_y_min, new_x_max - new_x_min, new_y_max - new_y_min], conf, "pothole"))
-
-        tracked_objects = tracker.update_tracks(detections, frame=frame)
-        
         current_frame_data = {}
-        for track in tracked_objects:
-            if not track.is_confirmed():
-                continue
-
-            track_id = track.track_id
-            with state.lock:
-                if track_id not in state.id_mapping:
-                    state.id_mapping[track_id] = state.global_track_id
-                    state.global_track_id += 1
-                unique_id = state.id_mapping[track_id]
-
-            x_min, y_min, w, h = map(int, track.to_ltwh())
-            if unique_id not in pothole_data:
-                length_real = convert_to_real_world(w)
-                breadth_real = convert_to_real_world(h)
-                depth_roi = depth_map[y_min:y_min + h, x_min:x_min + w]
-                valid_depth_values = depth_roi[depth_roi > 0]
-
-                # Updated depth calculation logic from second code
-                if valid_depth_values.size > 0:
-                    if unique_id not in pothole_depths:
-                        pothole_depths[unique_id] = []
-                    
-                    pothole_depths[unique_id].append(np.max(valid_depth_values) * 0.001)
-                    pothole_depths[unique_id] = sorted(pothole_depths[unique_id], reverse=True)[:4]
-                    fixed_depth = np.mean(pothole_depths[unique_id])
-                else:
-                    fixed_depth = 0
-                
-                pothole_data[unique_id] = (length_real, breadth_real, fixed_depth)
-
-            length_real, breadth_real, fixed_depth = pothole_data[unique_id]
+        for unique_id, ((x_min, y_min, x_max, y_max), (length_real, breadth_real, fixed_depth)) in frame_data.items():
+            w, h = x_max - x_min, y_max - y_min
             current_frame_data[unique_id] = {
                 "id": int(unique_id),
                 "position": {"x": x_min, "y": y_min, "width": w, "height": h},
                 "measurements": {"length": round(length_real, 2), "breadth": round(breadth_real, 2), "depth": round(fixed_depth, 2)}
             }
 
-            # Annotate frame with reduced bounding box
-            x_max, y_max = x_min + w, y_min + h
+            # Annotate frame
             cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), (0, 255, 0), 2)
             text = f"ID: {unique_id} | L: {length_real:.2f} cm, B: {breadth_real:.2f} cm, D: {fixed_depth:.2f} cm"
             cv2.putText(frame, text, (x_min, y_min - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
@@ -216,9 +136,7 @@ def process_video(video_path: str) -> None:
     cap.release()
     with state.lock:
         # Final update of global pothole data after processing ends
-        for track_id, (length_real, breadth_real, fixed_depth) in pothole_data.items():
-            if track_id not in state.global_pothole_data:
-                state.global_pothole_data[track_id] = (length_real, breadth_real, fixed_depth)
+        session.flush()
         state.processing_active = False
     logger.info("Video processing completed.")
 
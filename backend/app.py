@@ -10,7 +10,6 @@ import cv2
 import numpy as np
 from ultralytics import YOLO
 import torch
-from deep_sort_realtime.deepsort_tracker import DeepSort
 import pandas as pd
 from dotenv import load_dotenv
 import torchvision.transforms as transforms
@@ -18,10 +17,19 @@ from PIL import Image
 import matplotlib.pyplot as plt
 import seaborn as sns
 import json
+import xml.etree.ElementTree as ET
 
-
+# Before the inference imports: their settings are read from the environment at import time.
 load_dotenv()
 
+from inference.adapters import analyze_image, analyze_video
+from inference.calibration import CAMERA_PROFILE, add_severity, get_profile, load_profiles, remeasure
+from inference.detection_log import DetectionLog, load_log, merge_rescored, rescore_log, summarize
+from inference.engine import MidasDepth, YoloDetector
+from inference.geo import load_track, locate_potholes, parse_bbox
+from inference.pothole_store import PotholeStore
+
+
 app = Flask(__name__)
 CORS(app)
 
@@ -37,158 +45,46 @@ jwt = JWTManager(app)
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov'}
 ALLOWED_IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'bmp'}
+ALLOWED_GPS_EXTENSIONS = {'gpx', 'csv'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+DETECTION_LOG_FOLDER = os.path.join(UPLOAD_FOLDER, 'detections')
+
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Deduplicated potholes from GPS-tagged surveys (see inference/pothole_store.py)
+pothole_store = PotholeStore(mongo.db.potholes)
+
 
 MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
 MODEL_PATH = os.path.join(MODELS_DIR, 'best.pt')
 
 
 model = YOLO(MODEL_PATH, task="detect")
-tracker = DeepSort(max_age=30, max_iou_distance=0.3)
 model_type = "DPT_Hybrid"
-midas = torch.hub.load("intel-isl/MiDaS", model=model_type, pretrained=True)
-midas_transforms = torch.hub.load("intel-isl/MiDaS", "transforms").small_transform
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-midas.to(device).eval()
-
-def convert_to_real_world(pixels, conversion_factor=0.035):
-    
-    return pixels * conversion_factor
+depth_model = MidasDepth.load(model_type)
 
-def process_video(video_path):
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return None, "Error: Could not open video."
+camera_profiles = load_profiles()
+DEFAULT_CAMERA = CAMERA_PROFILE
 
-    pothole_data = {}
-    pothole_depths = {}
-    global_track_id = 1
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        results = model(frame)
-        
-        # Convert frame for MiDaS depth estimation
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        input_batch = midas_transforms(frame_rgb).to(device)
-
-        with torch.no_grad():
-            prediction = midas(input_batch)
-            prediction = torch.nn.functional.interpolate(
-                prediction.unsqueeze(1),
-                size=frame.shape[:2],
-                mode="bicubic",
-                align_corners=False,
-            ).squeeze()
-        depth_map = prediction.cpu().numpy()
-
-        # Prepare detections for tracker
-        detections = []
-        for result in results:
-            for box in result.boxes:
-                x_min, y_min, x_max, y_max = map(int, box.xyxy[0].tolist())
-                conf = float(box.conf[0])
-                detections.append(([x_min, y_min, x_max - x_min, y_max - y_min], conf, "pothole"))
-
-        # Update tracker with new detections
-        tracked_objects = tracker.update_tracks(detections, frame=frame)
-
-        for track in tracked_objects:
-            if not track.is_confirmed():
-                continue
+# Tracker, depth aggregation and tiling settings (TRACKER_BACKEND, DEPTH_AGGREGATION,
+# TILED_INFERENCE, ...) are read once by the inference modules.
+detector = YoloDetector(model)
 
-            track_id = track.track_id
-            if track_id not in pothole_data:
-                x_min, y_min, w, h = map(int, track.to_ltwh())
-                x_max, y_max = x_min + w, y_min + h
-
-                length_real = convert_to_real_world(w)
-                breadth_real = convert_to_real_world(h)
-
-                depth_roi = depth_map[y_min:y_max, x_min:x_max]
-                valid_depth_values = depth_roi[depth_roi > 0]
-
-                if valid_depth_values.size > 0:
-                    if track_id not in pothole_depths:
-                        pothole_depths[track_id] = []
-                    pothole_depths[track_id].append(np.max(valid_depth_values) * 0.001)
-                    pothole_depths[track_id] = sorted(pothole_depths[track_id], reverse=True)[:4]
-                    fixed_depth = np.mean(pothole_depths[track_id])
-                else:
-                    fixed_depth = 0
-
-                pothole_data[track_id] = {
-                    'id': global_track_id,
-                    'length': float(length_real),
-                    'breadth': float(breadth_real),
-                    'depth': float(fixed_depth),
-                    'volume': float(length_real * breadth_real * fixed_depth)
-                }
-                global_track_id += 1
+def process_video(video_path, profile=None, detection_log=None):
+    profile = profile or get_profile(DEFAULT_CAMERA, camera_profiles)
+    return analyze_video(detector, depth_model, profile, video_path, detection_log)
 
+def video_fps(video_path, default=30.0):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
     cap.release()
-    return list(pothole_data.values()), None
+    return fps if fps and fps > 0 else default
 
-def process_single_image(image_path):
+def process_single_image(image_path, profile=None, detection_log=None, tiled=None):
     """Process a single image for pothole detection."""
-    frame = cv2.imread(image_path)
-    if frame is None:
-        return None, "Error: Could not open image."
-
-    results = model(frame)
-    
-    # Convert frame for MiDaS depth estimation
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    input_batch = midas_transforms(frame_rgb).to(device)
-
-    with torch.no_grad():
-        prediction = midas(input_batch)
-        prediction = torch.nn.functional.interpolate(
-            prediction.unsqueeze(1),
-            size=frame.shape[:2],
-            mode="bicubic",
-            align_corners=False,
-        ).squeeze()
-    depth_map = prediction.cpu().numpy()
-
-    potholes = []
-    for result in results:
-        for box in result.boxes:
-            x_min, y_min, x_max, y_max = map(int, box.xyxy[0].tolist())
-            conf = float(box.conf[0])
-            
-            w = x_max - x_min
-            h = y_max - y_min
-            
-            length_real = convert_to_real_world(w)
-            breadth_real = convert_to_real_world(h)
-
-            depth_roi = depth_map[y_min:y_max, x_min:x_max]
-            valid_depth_values = depth_roi[depth_roi > 0]
-
-            if valid_depth_values.size > 0:
-                depth = np.max(valid_depth_values) * 0.001
-            else:
-                depth = 0
-
-            pothole_info = {
-                'id': len(potholes) + 1,
-                'length': float(length_real),
-                'breadth': float(breadth_real),
-                'depth': float(depth),
-                'volume': float(length_real * breadth_real * depth),
-                'confidence': float(conf),
-                'bbox': [x_min, y_min, x_max, y_max]
-            }
-            potholes.append(pothole_info)
-
-    return potholes, None
+    profile = profile or get_profile(DEFAULT_CAMERA, camera_profiles)
+    return analyze_image(detector, depth_model, profile, image_path, detection_log, tiled=tiled)
 
 @app.route('/api/register', methods=['POST'])
 def register():
@@ -229,41 +125,96 @@ def detect_potholes():
     if not file.filename.endswith(tuple(ALLOWED_VIDEO_EXTENSIONS)):
         return jsonify({'error': f'Invalid file type. Please upload a video file with one of the following extensions: {", ".join(ALLOWED_VIDEO_EXTENSIONS)}'}), 400
 
+    try:
+        profile = get_profile(request.form.get('camera', DEFAULT_CAMERA), camera_profiles)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Optional GPS sidecar (GPX or CSV) giving every pothole a location
+    gps_file = request.files.get('gps')
+    if gps_file and gps_file.filename and not gps_file.filename.lower().endswith(tuple('.' + ext for ext in ALLOWED_GPS_EXTENSIONS)):
+        return jsonify({'error': f'Invalid GPS file type. Please upload one of: {", ".join(ALLOWED_GPS_EXTENSIONS)}'}), 400
+
     filename = secure_filename(file.filename)
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     file.save(filepath)
+    gps_path = None
+    if gps_file and gps_file.filename:
+        gps_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(gps_file.filename))
+        gps_file.save(gps_path)
 
     try:
+        gps_track = None
+        if gps_path:
+            try:
+                gps_track = load_track(gps_path, offset=float(request.form.get('gps_offset', 0)))
+            except (ValueError, KeyError, ET.ParseError) as e:
+                return jsonify({'error': f'Invalid GPS file: {e}'}), 400
+
         # Process video and get results
-        results = process_video(filepath)
+        detection_log = DetectionLog(type='video', camera=profile.name)
+        potholes, error = process_video(filepath, profile, detection_log)
+        if error:
+            return jsonify({'error': error}), 500
+        log_filename = f"{os.path.splitext(filename)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.npz"
+        detection_log.save(os.path.join(DETECTION_LOG_FOLDER, log_filename))
         
-        # Save results to MongoDB
         user_id = get_jwt_identity()
+        store_stats = None
+        if gps_track is not None and potholes:
+            locate_potholes(potholes, gps_track, video_fps(filepath), profile)
+            store_stats = pothole_store.add_observations(
+                potholes, source={'user_id': user_id, 'filename': filename, 'detection_log': log_filename})
+
+        # Save results to MongoDB
         result_data = {
             'user_id': user_id,
             'type': 'video',
             'filename': filename,
+            'camera': profile.name,
             'timestamp': datetime.now(),
-            'total_potholes': len(results[0]),
-            'total_volume': sum(p['volume'] for p in results[0]),
-            'csv_file': results[1],
-            'potholes': results[0]
+            'total_potholes': len(potholes),
+            'total_volume': sum(p['volume'] for p in potholes),
+            'csv_file': None,
+            'detection_log': log_filename,
+            'potholes': potholes
         }
         mongo.db.analysis_results.insert_one(result_data)
 
         return jsonify({
-            'total_potholes': len(results[0]),
-            'total_volume': sum(p['volume'] for p in results[0]),
-            'potholes': results[0],
-            'csv_file': results[1]
+            'total_potholes': len(potholes),
+            'total_volume': sum(p['volume'] for p in potholes),
+            'potholes': potholes,
+            'csv_file': None,
+            'pothole_store': store_stats
         }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        # Clean up the video file
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        # Clean up the video and GPS files
+        for path in (filepath, gps_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+@app.route('/api/potholes', methods=['GET'])
+@jwt_required()
+def potholes_in_bbox():
+    """Deduplicated potholes inside ?bbox=min_lon,min_lat,max_lon,max_lat."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = parse_bbox(request.args.get('bbox', ''))
+        limit = int(request.args.get('limit', 1000))
+        min_observations = int(request.args.get('min_observations', 1))
+        if not 1 <= limit <= 10000:
+            raise ValueError('limit must be between 1 and 10000')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        potholes = pothole_store.within_bbox(min_lon, min_lat, max_lon, max_lat, limit, min_observations)
+        return jsonify({'count': len(potholes), 'potholes': potholes}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/detect/image', methods=['POST'])
 @jwt_required()
@@ -278,14 +229,22 @@ def detect_potholes_image():
     if not file.filename.lower().endswith(tuple('.' + ext for ext in ALLOWED_IMAGE_EXTENSIONS)):
         return jsonify({'error': f'Invalid file type. Please upload an image file with one of the following extensions: {", ".join(ALLOWED_IMAGE_EXTENSIONS)}'}), 400
 
+    try:
+        profile = get_profile(request.form.get('camera', DEFAULT_CAMERA), camera_profiles)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     filename = secure_filename(file.filename)
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     file.save(filepath)
 
     try:
-        potholes, error = process_single_image(filepath)
+        detection_log = DetectionLog(type='image', camera=profile.name)
+        potholes, error = process_single_image(filepath, profile, detection_log, request.form.get('tiled'))
         if error:
             return jsonify({'error': error}), 500
+        log_filename = f"{os.path.splitext(filename)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.npz"
+        detection_log.save(os.path.join(DETECTION_LOG_FOLDER, log_filename))
 
         # Calculate total volume needed
         total_volume = sum(pothole['volume'] for pothole in potholes)
@@ -314,10 +273,12 @@ def detect_potholes_image():
             'user_id': user_id,
             'type': 'image',
             'filename': filename,
+            'camera': profile.name,
             'timestamp': datetime.now(),
             'total_potholes': len(potholes),
             'total_volume': total_volume,
             'csv_file': csv_filename,
+            'detection_log': log_filename,
             'potholes': potholes
         }
         mongo.db.analysis_results.insert_one(result_data)
@@ -416,6 +377,35 @@ def detect_potholes_batch():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/remeasure', methods=['POST'])
+@jwt_required()
+def remeasure_analyses():
+    """Recompute measurements of stored analyses with another camera profile."""
+    data = request.json or {}
+    try:
+        profile = get_profile(data.get('camera', DEFAULT_CAMERA), camera_profiles)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        user_id = get_jwt_identity()
+        updated = 0
+        for result in mongo.db.analysis_results.find({'user_id': user_id, 'potholes.bbox': {'$exists': True}}):
+            # Prefer the full detection log; older analyses only have final boxes
+            if 'detection_log' in result:
+                detections, meta = load_log(os.path.join(DETECTION_LOG_FOLDER, result['detection_log']))
+                potholes = merge_rescored(result['potholes'], rescore_log(detections, meta, profile))
+            else:
+                potholes = add_severity(remeasure(result['potholes'], profile))
+            mongo.db.analysis_results.update_one({'_id': result['_id']}, {'$set': dict(
+                summarize(potholes), camera=profile.name, potholes=potholes)})
+            updated += 1
+
+        return jsonify({'camera': profile.name, 'updated_analyses': updated}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/history', methods=['GET'])
 @jwt_required()
 def get_user_history():
@@ -0,0 +1,8 @@
+"""Shared inference building blocks for the pothole detection pipelines."""
+from .trackers import IouKalmanTracker, DeepSortTracker, create_tracker
+from .engine import FrameResult, InferenceEngine, KerasDetector, MidasDepth, YoloDetector
+
+__all__ = [
+    "IouKalmanTracker", "DeepSortTracker", "create_tracker",
+    "FrameResult", "InferenceEngine", "KerasDetector", "MidasDepth", "YoloDetector",
+]
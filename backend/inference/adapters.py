@@ -0,0 +1,94 @@
+"""Entry-point adapters over :class:`~inference.engine.InferenceEngine`.
+
+``app.py`` and ``src/estimate.py`` keep their models, routes and state;
+everything between a loaded model and their output format lives here, so
+the tests in ``backend/tests`` exercise the same code the services run.
+
+* :func:`analyze_video` / :func:`analyze_image`: ``/api/detect`` and
+  ``/api/detect/image``.
+* :class:`StreamSession`: the live demo's bookkeeping, with global IDs that
+  survive the tracker reset on blackout frames.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+
+from .calibration import CameraProfile
+from .depth_stats import TrackDepthStats
+from .engine import FrameResult, InferenceEngine
+from .trackers import create_tracker
+
+Measurement = Tuple[float, float, float]  # length, breadth, depth in cm
+
+
+def video_engine(detector, profile: CameraProfile, depth=None, tracker: Optional[str] = None,
+                 depth_stats: Optional[TrackDepthStats] = None) -> InferenceEngine:
+    """Engine for one video: a fresh tracker (``TRACKER_BACKEND`` by default) and depth statistics."""
+    return InferenceEngine(detector, profile, depth=depth,
+                           tracker_factory=lambda: create_tracker(tracker, max_age=30),
+                           depth_stats=depth_stats if depth_stats is not None else TrackDepthStats())
+
+
+def analyze_video(detector, depth, profile: CameraProfile, video_path: str, detection_log=None,
+                  tracker: Optional[str] = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
+    """(pothole records, None) for a video file, or (None, error message)."""
+    try:
+        return video_engine(detector, profile, depth, tracker).run_video(video_path, detection_log), None
+    except IOError:
+        return None, "Error: Could not open video."
+
+
+def analyze_image(detector, depth, profile: CameraProfile, image_path: str, detection_log=None,
+                  tiled: Optional[str] = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
+    """(pothole records, None) for an image file, or (None, error message)."""
+    frame = cv2.imread(image_path)
+    if frame is None:
+        return None, "Error: Could not open image."
+    return InferenceEngine(detector, profile, depth=depth).run_image(frame, detection_log, tiled=tiled), None
+
+
+class StreamSession:
+    """Per-frame pothole bookkeeping of the live demo.
+
+    Every track gets a global ID. A pothole keeps the size from its first
+    confirmed frame and the depth from its latest. A frame without
+    detections is a blackout: the current potholes move to ``finished`` (an
+    ID already there keeps its first measurement) and the engine is reset.
+    ``finished`` and ``id_mapping`` may be dicts the caller shares with
+    other threads under its own lock. Feed it results of
+    ``engine.process_frame(frame, skip_empty=True)`` so blackout frames
+    skip tracking and depth.
+    """
+
+    def __init__(self, engine: InferenceEngine, finished: Optional[Dict[int, Measurement]] = None,
+                 id_mapping: Optional[Dict] = None):
+        self.engine = engine
+        self.finished = {} if finished is None else finished
+        self.id_mapping = {} if id_mapping is None else id_mapping
+        self.next_id = 1
+        self.current: Dict[int, Measurement] = {}
+
+    def record(self, result: FrameResult) -> Optional[Dict[int, Tuple[Tuple[int, int, int, int], Measurement]]]:
+        """Fold in one frame: ``{global id: (ltrb box, measurement)}``, or None on a blackout."""
+        if result.detections == 0:
+            self.flush()
+            self.engine.reset()
+            return None
+        frame_data = {}
+        for key, box, depth, length, breadth in zip(result.keys, result.boxes, result.depths,
+                                                     result.lengths, result.breadths):
+            if key not in self.id_mapping:
+                self.id_mapping[key] = self.next_id
+                self.next_id += 1
+            unique_id = self.id_mapping[key]
+            length, breadth = self.current.get(unique_id, (float(length), float(breadth)))[:2]
+            self.current[unique_id] = (length, breadth, float(depth))
+            frame_data[unique_id] = (tuple(int(v) for v in box), self.current[unique_id])
+        return frame_data
+
+    def flush(self) -> Dict[int, Measurement]:
+        """Move the current potholes to ``finished`` and return it."""
+        for unique_id, measurement in self.current.items():
+            self.finished.setdefault(unique_id, measurement)
+        self.current.clear()
+        return self.finished
@@ -0,0 +1,245 @@
+"""Benchmarks for the shared inference components.
+
+Usage (from the ``backend`` directory)::
+
+    python -m inference.benchmark trackers clip1.mp4 clip2.mp4 --model models/best.pt
+    python -m inference.benchmark tiled --limit 100
+    python -m inference.benchmark localize --limit 60
+"""
+import argparse
+import itertools
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .localization import LOCALIZE_WIDTH, locate_contours, locate_regions
+from .tiling import TILE_OVERLAP, TILE_SIZE, detect_tiled
+from .trackers import TRACKERS, create_tracker, iou_matrix
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                           "Pothole Detection and Dimension Estimation System", "datasets")
+
+FrameTracks = List[Tuple[str, np.ndarray]]
+
+
+def collect_detections(video_path: str, model) -> List[list]:
+    """Run YOLO once over a clip and keep only the per-frame detections."""
+    from .engine import iter_frames
+
+    detections = []
+    for frame in iter_frames(video_path):
+        result = model(frame, verbose=False)[0]
+        xyxy = result.boxes.xyxy.cpu().numpy()
+        conf = result.boxes.conf.cpu().numpy()
+        detections.append([
+            ([x1, y1, x2 - x1, y2 - y1], float(c), "pothole") for (x1, y1, x2, y2), c in zip(xyxy, conf)
+        ])
+    return detections
+
+
+def count_id_switches(history: Sequence[FrameTracks], iou_threshold: float = 0.5) -> int:
+    """Count boxes that overlap a box in the previous frame but carry a different ID.
+
+    This is a ground-truth-free proxy: potholes are static, so a confirmed box
+    that keeps overlapping itself frame to frame should keep its ID.
+    """
+    switches = 0
+    for prev, curr in zip(history, history[1:]):
+        if not prev or not curr:
+            continue
+        iou = iou_matrix(np.array([b for _, b in curr]), np.array([b for _, b in prev]))
+        best = iou.argmax(axis=1)
+        for i, (track_id, _) in enumerate(curr):
+            if iou[i, best[i]] >= iou_threshold and prev[best[i]][0] != track_id:
+                switches += 1
+    return switches
+
+
+# Backends whose update() looks at the frame (DeepSORT crops boxes for its appearance embedder).
+NEEDS_FRAMES = {"deepsort"}
+
+
+def run_tracker(name: str, detections: Sequence[list], video_path: Optional[str] = None) -> Dict[str, float]:
+    """Feed pre-computed detections through one tracker backend.
+
+    Frames are decoded again from ``video_path`` only for backends that use
+    them, one at a time, so memory does not grow with clip length. Only the
+    ``update`` calls are timed.
+    """
+    from .engine import iter_frames
+
+    tracker = create_tracker(name, max_age=30)
+    frames = iter_frames(video_path) if name in NEEDS_FRAMES and video_path else itertools.repeat(None)
+    history: List[FrameTracks] = []
+    elapsed = 0.0
+    for dets, frame in zip(detections, frames):
+        start = time.perf_counter()
+        tracks = tracker.update(dets, frame=frame)
+        elapsed += time.perf_counter() - start
+        history.append([(str(t.track_id), np.asarray(t.to_ltrb(), dtype=np.float64))
+                        for t in tracks if t.is_confirmed()])
+    return {
+        "frames": len(detections),
+        "fps": len(detections) / elapsed if elapsed > 0 else float("inf"),
+        "ms_per_frame": 1000 * elapsed / max(len(detections), 1),
+        "unique_ids": len({tid for frame_tracks in history for tid, _ in frame_tracks}),
+        "id_switches": count_id_switches(history),
+    }
+
+
+def compare_trackers(video_paths: Iterable[str], model_path: str, backends: Sequence[str]) -> Dict[str, Dict]:
+    """Compare tracker throughput and ID stability on identical detections."""
+    from ultralytics import YOLO
+
+    model = YOLO(model_path, task="detect")
+    report = {}
+    for path in video_paths:
+        detections = collect_detections(path, model)
+        report[path] = {name: run_tracker(name, detections, path) for name in backends}
+    return report
+
+
+def load_labelled_images(dataset_dir: str, limit: int = 0):
+    """Yield ``(name, image, gt_boxes_xyxy)`` for images with a YOLO label file."""
+    import cv2
+
+    images_dir, labels_dir = os.path.join(dataset_dir, "images"), os.path.join(dataset_dir, "labels")
+    names = sorted(n for n in os.listdir(images_dir)
+                   if os.path.exists(os.path.join(labels_dir, os.path.splitext(n)[0] + ".txt")))
+    for name in names[:limit or None]:
+        image = cv2.imread(os.path.join(images_dir, name))
+        if image is None:
+            continue
+        h, w = image.shape[:2]
+        labels = np.loadtxt(os.path.join(labels_dir, os.path.splitext(name)[0] + ".txt"), ndmin=2)
+        xc, yc, bw, bh = (labels[:, 1:5] * [w, h, w, h]).T if len(labels) else np.zeros((4, 0))
+        yield name, image, np.stack([xc - bw / 2, yc - bh / 2, xc + bw / 2, yc + bh / 2], axis=1)
+
+
+def recall_at(pred: np.ndarray, gt: np.ndarray, iou_threshold: float = 0.5) -> int:
+    """Number of ground-truth boxes matched by some prediction."""
+    if not len(gt) or not len(pred):
+        return 0
+    return int((iou_matrix(gt, pred).max(axis=1) >= iou_threshold).sum())
+
+
+def compare_tiling(dataset_dir: str, model_path: str, target_side: int = 3840, limit: int = 0,
+                   tile_size: int = TILE_SIZE, overlap: float = TILE_OVERLAP) -> Dict[str, Dict]:
+    """Full-frame vs tiled inference on dataset images upscaled to ``target_side``."""
+    import cv2
+    from ultralytics import YOLO
+
+    model = YOLO(model_path, task="detect")
+    modes = {
+        "full_frame": lambda img: (model(img, verbose=False)[0].boxes.xyxy.cpu().numpy(), None),
+        "tiled": lambda img: detect_tiled(model, img, tile_size, overlap),
+    }
+    stats = {mode: {"images": 0, "seconds": 0.0, "gt": 0, "matched": 0, "predictions": 0} for mode in modes}
+    for _, image, gt in load_labelled_images(dataset_dir, limit):
+        scale = target_side / max(image.shape[:2])
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        gt = gt * scale
+        for mode, run in modes.items():
+            start = time.perf_counter()
+            boxes, _ = run(image)
+            stats[mode]["seconds"] += time.perf_counter() - start
+            stats[mode]["images"] += 1
+            stats[mode]["gt"] += len(gt)
+            stats[mode]["matched"] += recall_at(boxes, gt)
+            stats[mode]["predictions"] += len(boxes)
+
+    return {f"{dataset_dir} @ {target_side}px": {mode: {
+        "images_per_sec": s["images"] / s["seconds"] if s["seconds"] else 0.0,
+        "recall@0.5": s["matched"] / s["gt"] if s["gt"] else 0.0,
+        "predictions": s["predictions"],
+    } for mode, s in stats.items()}}
+
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+# Downscale width benchmarked when LOCALIZE_WIDTH keeps the service at full resolution.
+FAST_LOCALIZE_WIDTH = LOCALIZE_WIDTH or 960
+
+
+def compare_localization(dataset_dir: str = DATASET_DIR, limit: int = 60,
+                         resolutions: Sequence[str] = tuple(RESOLUTIONS),
+                         max_width: int = FAST_LOCALIZE_WIDTH) -> Dict[str, Dict]:
+    """Per-frame cost of full-resolution contours vs the downscaled path.
+
+    Frames are dataset images resized to each resolution; ``recall@0.5`` is
+    the share of full-resolution boxes the fast path also finds.
+    """
+    import cv2
+
+    images = [image for _, image, _ in load_labelled_images(dataset_dir, limit)]
+
+    def ltrb(ltwh):
+        return np.column_stack([ltwh[:, :2], ltwh[:, :2] + ltwh[:, 2:]]).astype(np.float64)
+
+    modes = {
+        "contours": locate_contours,
+        "regions": lambda frame: locate_regions(frame, max_width=max_width),
+    }
+    report = {}
+    for name in resolutions:
+        frames = [cv2.resize(image, RESOLUTIONS[name], interpolation=cv2.INTER_AREA) for image in images]
+        rows = {}
+        boxes = {}
+        for mode, locate in modes.items():
+            start = time.perf_counter()
+            boxes[mode] = [locate(frame) for frame in frames]
+            elapsed = time.perf_counter() - start
+            rows[mode] = {"ms_per_frame": 1000 * elapsed / max(len(frames), 1),
+                          "boxes": sum(len(b) for b in boxes[mode])}
+        reference = sum(len(b) for b in boxes["contours"])
+        matched = sum(recall_at(ltrb(fast), ltrb(ref)) for ref, fast in zip(boxes["contours"], boxes["regions"]))
+        rows["regions"]["recall@0.5"] = matched / reference if reference else 1.0
+        report[f"{name} ({RESOLUTIONS[name][0]}x{RESOLUTIONS[name][1]}, {len(frames)} frames)"] = rows
+    return report
+
+
+def print_report(report: Dict[str, Dict]) -> None:
+    for source, rows in report.items():
+        print(source)
+        for name, stats in rows.items():
+            print(f"  {name:<10} " + "  ".join(
+                f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in stats.items()))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    trackers = sub.add_parser("trackers", help="compare tracker backends on the same clips")
+    trackers.add_argument("videos", nargs="+")
+    trackers.add_argument("--model", default="models/best.pt")
+    trackers.add_argument("--backends", nargs="+", default=list(TRACKERS), choices=list(TRACKERS))
+
+    tiled = sub.add_parser("tiled", help="full-frame vs tiled inference on the dataset upscaled to 4K")
+    tiled.add_argument("--dataset", default=DATASET_DIR)
+    tiled.add_argument("--model", default="models/best.pt")
+    tiled.add_argument("--side", type=int, default=3840)
+    tiled.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    tiled.add_argument("--overlap", type=float, default=TILE_OVERLAP)
+    tiled.add_argument("--limit", type=int, default=0)
+
+    localize = sub.add_parser("localize", help="Keras-path localisation on dataset images at 720p/1080p/4K")
+    localize.add_argument("--dataset", default=DATASET_DIR)
+    localize.add_argument("--limit", type=int, default=60)
+    localize.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    localize.add_argument("--max-width", type=int, default=FAST_LOCALIZE_WIDTH,
+                          help="downscale width of the fast path (frames at least twice as wide)")
+
+    args = parser.parse_args(argv)
+    if args.command == "trackers":
+        print_report(compare_trackers(args.videos, args.model, args.backends))
+    elif args.command == "tiled":
+        print_report(compare_tiling(args.dataset, args.model, args.side, args.limit, args.tile_size, args.overlap))
+    elif args.command == "localize":
+        print_report(compare_localization(args.dataset, args.limit, args.resolutions, args.max_width))
+
+
+if __name__ == "__main__":
+    main()
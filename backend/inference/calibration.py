@@ -0,0 +1,170 @@
+"""Camera calibration profiles and ground-plane measurement.
+
+Profiles are read from a JSON file (``CAMERA_CONFIG``, default
+``backend/cameras.json``) mapping a profile name to either a legacy constant
+``pixel_scale`` (cm per pixel) or full intrinsics plus mounting geometry::
+
+    {"dashcam": {"fx": 1000, "fy": 1000, "cx": 960, "cy": 540,
+                 "image_size": [1920, 1080], "height_m": 1.5, "tilt_deg": 15}}
+
+Calibrated profiles project bbox corners onto the road plane, so length and
+breadth account for perspective. Stored detections (bbox, raw depth, frame
+size) can be re-measured with a different profile without re-running YOLO or
+MiDaS via :func:`remeasure`.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CAMERA_CONFIG = os.getenv(
+    "CAMERA_CONFIG", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cameras.json"))
+DEFAULT_PROFILE = "default"
+CAMERA_PROFILE = os.getenv("CAMERA_PROFILE", DEFAULT_PROFILE)
+
+# Historical constants: 0.035 cm per pixel and MiDaS output scaled by 0.001.
+LEGACY_PIXEL_SCALE = 0.035
+LEGACY_DEPTH_SCALE = 0.001
+
+# Volume thresholds in cm³ for medium/high severity, as used by the dashboard.
+SEVERITY_THRESHOLDS = (2000.0, 5000.0)
+
+
+def severity_of(volumes: np.ndarray, thresholds: Sequence[float] = SEVERITY_THRESHOLDS) -> List[str]:
+    """``low``/``medium``/``high`` per volume; a level starts strictly above its threshold."""
+    levels = np.searchsorted(np.asarray(thresholds, dtype=np.float64), np.asarray(volumes), side="left")
+    return [("low", "medium", "high")[level] for level in levels]
+
+
+def add_severity(potholes: List[Dict], thresholds: Sequence[float] = SEVERITY_THRESHOLDS) -> List[Dict]:
+    """Set ``severity`` on pothole records in place from their ``volume``."""
+    for pothole, severity in zip(potholes, severity_of([p['volume'] for p in potholes], thresholds)):
+        pothole['severity'] = severity
+    return potholes
+
+
+class CameraProfile:
+    """Intrinsics and mounting of one camera, or a legacy constant scale."""
+
+    def __init__(self, name: str, pixel_scale: Optional[float] = None,
+                 fx: Optional[float] = None, fy: Optional[float] = None,
+                 cx: Optional[float] = None, cy: Optional[float] = None,
+                 image_size: Optional[Sequence[int]] = None,
+                 height_m: float = 1.5, tilt_deg: float = 0.0,
+                 depth_scale: float = LEGACY_DEPTH_SCALE):
+        if fx is None and pixel_scale is None:
+            pixel_scale = LEGACY_PIXEL_SCALE
+        self.name = name
+        self.pixel_scale = pixel_scale
+        self.fx = fx
+        self.fy = fy if fy is not None else fx
+        self.cx = cx
+        self.cy = cy
+        self.image_size = tuple(image_size) if image_size else None
+        self.height_m = height_m
+        self.tilt_deg = tilt_deg
+        self.depth_scale = depth_scale
+
+    @property
+    def calibrated(self) -> bool:
+        return self.fx is not None
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict) -> "CameraProfile":
+        return cls(name, **data)
+
+    def to_dict(self) -> Dict:
+        keys = ("pixel_scale", "fx", "fy", "cx", "cy", "image_size", "height_m", "tilt_deg", "depth_scale")
+        return {key: getattr(self, key) for key in keys if getattr(self, key) is not None}
+
+    def _intrinsics(self, frame_size: Optional[Sequence[int]]) -> Tuple[float, float, float, float]:
+        """Intrinsics rescaled to the frame being measured."""
+        width, height = frame_size or self.image_size or (2 * (self.cx or 0), 2 * (self.cy or 0))
+        ref_w, ref_h = self.image_size or (width, height)
+        sx, sy = width / ref_w, height / ref_h
+        cx = self.cx if self.cx is not None else ref_w / 2
+        cy = self.cy if self.cy is not None else ref_h / 2
+        return self.fx * sx, self.fy * sy, cx * sx, cy * sy
+
+    def ground_points(self, uv: np.ndarray, frame_size: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Project pixel coordinates ``(..., 2)`` to road-plane ``(X, Z)`` in meters.
+
+        X is lateral, Z is forward distance. Pixels at or above the horizon
+        come back as NaN.
+        """
+        fx, fy, cx, cy = self._intrinsics(frame_size)
+        uv = np.asarray(uv, dtype=np.float64)
+        x = (uv[..., 0] - cx) / fx
+        y = (uv[..., 1] - cy) / fy
+        tilt = np.deg2rad(self.tilt_deg)
+        # Camera pitched down by ``tilt``: rotate the ray about the x axis.
+        y_w = y * np.cos(tilt) + np.sin(tilt)
+        z_w = np.cos(tilt) - y * np.sin(tilt)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(y_w > 1e-9, self.height_m / y_w, np.nan)
+        return np.stack([t * x, t * z_w], axis=-1)
+
+    def measure(self, boxes: np.ndarray, frame_size: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Real-world length and breadth in cm for an ``(N, 4)`` array of ltrb boxes."""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if not self.calibrated:
+            return (boxes[:, 2] - boxes[:, 0]) * self.pixel_scale, (boxes[:, 3] - boxes[:, 1]) * self.pixel_scale
+
+        x1, y1, x2, y2 = boxes.T
+        corners = np.stack([np.stack([x1, y2], -1), np.stack([x2, y2], -1),
+                            np.stack([x1, y1], -1), np.stack([x2, y1], -1)], axis=1)
+        bl, br, tl, tr = np.moveaxis(self.ground_points(corners, frame_size), 1, 0)
+        length = (np.abs(br[:, 0] - bl[:, 0]) + np.abs(tr[:, 0] - tl[:, 0])) / 2
+        breadth = (np.abs(tl[:, 1] - bl[:, 1]) + np.abs(tr[:, 1] - br[:, 1])) / 2
+        return np.nan_to_num(length * 100), np.nan_to_num(breadth * 100)
+
+    def depth(self, raw_depth: np.ndarray) -> np.ndarray:
+        """Convert raw MiDaS depth samples to cm."""
+        return np.nan_to_num(np.asarray(raw_depth, dtype=np.float64) * self.depth_scale)
+
+
+def load_profiles(path: str = CAMERA_CONFIG) -> Dict[str, CameraProfile]:
+    """Load camera profiles; a legacy ``default`` profile is always present."""
+    profiles = {DEFAULT_PROFILE: CameraProfile(DEFAULT_PROFILE)}
+    if os.path.exists(path):
+        with open(path) as f:
+            for name, data in json.load(f).items():
+                profiles[name] = CameraProfile.from_dict(name, data)
+    return profiles
+
+
+def get_profile(name: Optional[str], profiles: Dict[str, CameraProfile]) -> CameraProfile:
+    name = name or CAMERA_PROFILE
+    if name not in profiles:
+        raise ValueError(f"Unknown camera profile '{name}'. Choose from: {', '.join(profiles)}")
+    return profiles[name]
+
+
+def remeasure(potholes: List[Dict], profile: CameraProfile,
+              frame_size: Optional[Sequence[int]] = None) -> List[Dict]:
+    """Recompute length/breadth/depth/volume of stored pothole records in place.
+
+    Records need ``bbox`` and ``raw_depth``; ``frame_size`` falls back to the
+    value stored on each record.
+    """
+    measurable = [p for p in potholes if 'bbox' in p and 'raw_depth' in p]
+    if not measurable:
+        return potholes
+    boxes = np.array([p['bbox'] for p in measurable], dtype=np.float64)
+    depths = profile.depth([p['raw_depth'] for p in measurable])
+
+    # Measure all records sharing a frame size in one vectorized call.
+    groups: Dict[Optional[Tuple[int, int]], List[int]] = {}
+    for i, record in enumerate(measurable):
+        size = frame_size or record.get('frame_size')
+        groups.setdefault(tuple(size) if size else None, []).append(i)
+    for size, idx in groups.items():
+        length, breadth = profile.measure(boxes[idx], size)
+        for j, i in enumerate(idx):
+            record = measurable[i]
+            record['length'] = float(length[j])
+            record['breadth'] = float(breadth[j])
+            record['depth'] = float(depths[i])
+            record['volume'] = float(length[j] * breadth[j] * depths[i])
+    return potholes
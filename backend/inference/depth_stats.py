@@ -0,0 +1,171 @@
+"""Bounded per-track depth statistics.
+
+Each tracked pothole gets one fixed-size row in a set of preallocated arrays
+(top-k buffer, running max, rolling window for median/percentile), and a whole
+frame of tracks is folded in with a single vectorized update. Memory depends
+only on ``max_tracks``, ``k`` and ``window``, never on video length.
+"""
+import os
+from typing import Dict, Hashable, Iterable, Sequence
+
+import numpy as np
+
+AGGREGATIONS = ("topk_mean", "max", "median", "percentile")
+
+DEPTH_AGGREGATION = os.getenv("DEPTH_AGGREGATION", "topk_mean")
+DEPTH_TOPK = int(os.getenv("DEPTH_TOPK", "4"))
+DEPTH_PERCENTILE = float(os.getenv("DEPTH_PERCENTILE", "90"))
+
+
+def sample_box_depths(depth_map: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """Max positive depth inside each ltrb box, NaN where the box has none.
+
+    The max over the ROI view equals the max over its positive values whenever
+    that max is positive, so no boolean-mask copy of the ROI is needed.
+    """
+    h, w = depth_map.shape[:2]
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    x1 = np.clip(boxes[:, 0], 0, w)
+    y1 = np.clip(boxes[:, 1], 0, h)
+    x2 = np.clip(boxes[:, 2], 0, w)
+    y2 = np.clip(boxes[:, 3], 0, h)
+    samples = np.full(len(boxes), np.nan, dtype=np.float32)
+    for i in range(len(boxes)):
+        if x2[i] > x1[i] and y2[i] > y1[i]:
+            peak = depth_map[y1[i]:y2[i], x1[i]:x2[i]].max()
+            if peak > 0:
+                samples[i] = peak
+    return samples
+
+
+class TrackDepthStats:
+    """Array-backed depth statistics keyed by track ID.
+
+    ``aggregation`` picks what ``update``/``get`` report: ``topk_mean`` (mean of
+    the ``k`` deepest samples, the historical behaviour), ``max``, ``median``
+    or ``percentile`` over the last ``window`` samples.
+    """
+
+    def __init__(self, aggregation: str = DEPTH_AGGREGATION, k: int = DEPTH_TOPK, window: int = 64,
+                 percentile: float = DEPTH_PERCENTILE, max_tracks: int = 4096):
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown depth aggregation '{aggregation}'. Choose from: {', '.join(AGGREGATIONS)}")
+        self.aggregation = aggregation
+        self.k = k
+        self.window = window
+        self.percentile = percentile
+        self.max_tracks = max_tracks
+        self._slots: Dict[Hashable, int] = {}
+        self._tick = 0
+        self._allocate(min(64, max_tracks))
+
+    def _allocate(self, capacity: int) -> None:
+        self._topk = np.full((capacity, self.k), np.nan, dtype=np.float32)
+        self._max = np.full(capacity, np.nan, dtype=np.float32)
+        self._window = np.full((capacity, self.window), np.nan, dtype=np.float32)
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._last_seen = np.zeros(capacity, dtype=np.int64)
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def _grow(self) -> None:
+        old = len(self._max)
+        capacity = min(old * 2, self.max_tracks)
+        pad = capacity - old
+        self._topk = np.vstack([self._topk, np.full((pad, self.k), np.nan, dtype=np.float32)])
+        self._max = np.concatenate([self._max, np.full(pad, np.nan, dtype=np.float32)])
+        self._window = np.vstack([self._window, np.full((pad, self.window), np.nan, dtype=np.float32)])
+        self._count = np.concatenate([self._count, np.zeros(pad, dtype=np.int64)])
+        self._last_seen = np.concatenate([self._last_seen, np.zeros(pad, dtype=np.int64)])
+        self._free = list(range(capacity - 1, old - 1, -1)) + self._free
+
+    def _reset_slots(self, slots: np.ndarray) -> None:
+        self._topk[slots] = np.nan
+        self._max[slots] = np.nan
+        self._window[slots] = np.nan
+        self._count[slots] = 0
+
+    def _slot(self, key: Hashable) -> int:
+        slot = self._slots.get(key)
+        if slot is None:
+            if not self._free:
+                if len(self._max) < self.max_tracks:
+                    self._grow()
+                else:
+                    # Evict the least recently updated track to keep memory bounded. Slots
+                    # claimed earlier in this update carry the current tick, so they are never picked.
+                    victim_slot = int(np.argmin(self._last_seen))
+                    if self._last_seen[victim_slot] == self._tick:
+                        raise ValueError(f"More than max_tracks={self.max_tracks} tracks in one update")
+                    victim = next(k for k, s in self._slots.items() if s == victim_slot)
+                    self.drop([victim])
+            slot = self._free.pop()
+            self._slots[key] = slot
+        self._last_seen[slot] = self._tick
+        return slot
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def update(self, keys: Sequence[Hashable], samples: np.ndarray) -> np.ndarray:
+        """Fold one depth sample per track into the store and return the aggregates.
+
+        NaN samples (no valid depth in the box) leave that track unchanged.
+        """
+        self._tick += 1
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        slots = np.fromiter((self._slot(key) for key in keys), dtype=np.int64, count=len(keys))
+        valid = ~np.isnan(samples)
+        s, v = slots[valid], samples[valid]
+        if len(s):
+            rows = np.concatenate([self._topk[s], v[:, None]], axis=1)
+            # Descending sort with NaN (empty) entries pushed to the end.
+            self._topk[s] = -np.sort(-rows, axis=1)[:, :self.k]
+            self._max[s] = np.fmax(self._max[s], v)
+            self._window[s, self._count[s] % self.window] = v
+            self._count[s] += 1
+        return self._aggregate(slots)
+
+    def get(self, keys: Sequence[Hashable]) -> np.ndarray:
+        """Current aggregate for each key (0 for unknown tracks)."""
+        slots = np.array([self._slots.get(key, -1) for key in keys], dtype=np.int64)
+        out = np.zeros(len(slots), dtype=np.float32)
+        known = slots >= 0
+        out[known] = self._aggregate(slots[known])
+        return out
+
+    def _aggregate(self, slots: np.ndarray) -> np.ndarray:
+        out = np.zeros(len(slots), dtype=np.float32)
+        seen = self._count[slots] > 0
+        s = slots[seen]
+        if not len(s):
+            return out
+        if self.aggregation == "max":
+            out[seen] = self._max[s]
+        elif self.aggregation == "topk_mean":
+            topk = self._topk[s]
+            filled = ~np.isnan(topk)
+            out[seen] = np.where(filled, topk, 0).sum(axis=1) / filled.sum(axis=1)
+        elif self.aggregation == "median":
+            out[seen] = np.nanmedian(self._window[s], axis=1)
+        else:
+            out[seen] = np.nanpercentile(self._window[s], self.percentile, axis=1)
+        return out
+
+    def drop(self, keys: Sequence[Hashable]) -> None:
+        """Release the rows of finished tracks."""
+        slots = [self._slots.pop(key) for key in keys if key in self._slots]
+        if slots:
+            self._reset_slots(np.asarray(slots, dtype=np.int64))
+            self._free.extend(slots)
+
+    def retain(self, keys: Iterable[Hashable]) -> None:
+        """Drop every track not in ``keys`` (e.g. the tracker's live tracks)."""
+        keys = set(keys)
+        self.drop([key for key in self._slots if key not in keys])
+
+    def clear(self) -> None:
+        self._slots.clear()
+        self._allocate(len(self._max))
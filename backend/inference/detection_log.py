@@ -0,0 +1,204 @@
+"""Compact binary detection logs and re-scoring.
+
+Every analysis writes one ``.npz`` file holding a structured array with one
+row per (frame, track) observation plus a small JSON metadata blob. Changing
+the camera profile, depth aggregation or severity thresholds then only needs
+:func:`rescore_log` over the log, not another YOLO + MiDaS pass.
+
+Re-score stored analyses from the ``backend`` directory with::
+
+    python -m inference.detection_log --camera dashcam_1080p --aggregation max
+"""
+import argparse
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .calibration import (CAMERA_CONFIG, CAMERA_PROFILE, SEVERITY_THRESHOLDS, CameraProfile, add_severity,
+                          get_profile, load_profiles)
+from .depth_stats import AGGREGATIONS, DEPTH_AGGREGATION, DEPTH_PERCENTILE, DEPTH_TOPK
+
+DETECTION_DTYPE = np.dtype([
+    ("frame", "<u4"),
+    ("track_id", "<i4"),
+    ("bbox", "<f4", (4,)),
+    ("confidence", "<f4"),
+    ("depth_max", "<f4"),
+])
+
+class DetectionLog:
+    """Append-only buffer of per-frame observations for one analysis."""
+
+    def __init__(self, **meta):
+        self.meta = meta
+        self._chunks: List[np.ndarray] = []
+
+    def append(self, frame: int, track_ids: Sequence[int], boxes: np.ndarray,
+               confidences: Sequence[float], depth_max: Sequence[float]) -> None:
+        n = len(track_ids)
+        if not n:
+            return
+        chunk = np.empty(n, dtype=DETECTION_DTYPE)
+        chunk["frame"] = frame
+        chunk["track_id"] = track_ids
+        chunk["bbox"] = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        chunk["confidence"] = np.asarray(confidences, dtype=np.float32)
+        chunk["depth_max"] = np.asarray(depth_max, dtype=np.float32)
+        self._chunks.append(chunk)
+
+    def to_array(self) -> np.ndarray:
+        if not self._chunks:
+            return np.empty(0, dtype=DETECTION_DTYPE)
+        return np.concatenate(self._chunks)
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, detections=self.to_array(), meta=np.frombuffer(json.dumps(self.meta).encode(), dtype=np.uint8))
+        return path
+
+
+def load_log(path: str) -> Tuple[np.ndarray, Dict]:
+    with np.load(path) as data:
+        return data["detections"], json.loads(data["meta"].tobytes().decode())
+
+
+def _group_depths(depth: np.ndarray, starts: np.ndarray, aggregation: str, k: int,
+                  percentile: float, window: int) -> np.ndarray:
+    """Aggregate raw depth per track; ``depth`` is grouped by track, in frame order."""
+    valid = ~np.isnan(depth)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    out = np.zeros(len(starts), dtype=np.float64)
+    filled = np.where(valid, depth, -np.inf)
+    if aggregation == "max":
+        out = np.maximum.reduceat(filled, starts)
+    elif aggregation == "topk_mean":
+        group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(depth))))
+        order = np.lexsort((-filled, group))
+        rank = np.arange(len(depth)) - starts[group[order]]
+        keep = (rank < k) & valid[order]
+        sums = np.bincount(group[order], weights=np.where(keep, depth[order], 0), minlength=len(starts))
+        out = sums / np.maximum(np.bincount(group[order], weights=keep, minlength=len(starts)), 1)
+    else:
+        ends = np.append(starts[1:], len(depth))
+        q = 50.0 if aggregation == "median" else percentile
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            samples = depth[start:end][valid[start:end]][-window:]
+            if len(samples):
+                out[i] = np.percentile(samples, q)
+    return np.where(counts > 0, out, 0.0)
+
+
+def rescore_log(detections: np.ndarray, meta: Dict, profile: CameraProfile,
+                aggregation: str = DEPTH_AGGREGATION, k: int = DEPTH_TOPK,
+                percentile: float = DEPTH_PERCENTILE, window: int = 64,
+                severity_thresholds: Sequence[float] = SEVERITY_THRESHOLDS) -> List[Dict]:
+    """Rebuild the pothole records of one analysis from its detection log."""
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unknown depth aggregation '{aggregation}'. Choose from: {', '.join(AGGREGATIONS)}")
+    if not len(detections):
+        return []
+
+    # Group observations by track, keeping frame order inside each group.
+    order = np.lexsort((detections["frame"], detections["track_id"]))
+    grouped = detections[order]
+    track_ids, starts = np.unique(grouped["track_id"], return_index=True)
+    first = grouped[starts]
+
+    raw_depth = _group_depths(grouped["depth_max"].astype(np.float64), starts, aggregation, k, percentile, window)
+    depth = profile.depth(raw_depth)
+    length, breadth = profile.measure(first["bbox"], meta.get("frame_size"))
+    volume = length * breadth * depth
+    confidence = np.maximum.reduceat(np.nan_to_num(grouped["confidence"], nan=0.0), starts)
+    last_frame = np.maximum.reduceat(grouped["frame"], starts)
+
+    potholes = []
+    for i in np.argsort(first["frame"], kind="stable"):
+        pothole = {
+            'id': int(track_ids[i]),
+            'length': float(length[i]),
+            'breadth': float(breadth[i]),
+            'depth': float(depth[i]),
+            'volume': float(volume[i]),
+            'bbox': first["bbox"][i].astype(int).tolist(),
+            'raw_depth': float(raw_depth[i]),
+            'frame_size': meta.get("frame_size"),
+        }
+        if meta.get("type") == "image":
+            pothole['confidence'] = float(confidence[i])
+        else:
+            pothole['frame'] = int(first["frame"][i])
+            pothole['last_frame'] = int(last_frame[i])
+        potholes.append(pothole)
+    return add_severity(potholes, severity_thresholds)
+
+
+def merge_rescored(stored: List[Dict], rescored: List[Dict]) -> List[Dict]:
+    """Re-scored records on top of the stored ones with the same ``id``.
+
+    Fields the log does not hold, such as ``location`` and ``pothole_id``
+    from a GPS sidecar, are kept.
+    """
+    by_id = {pothole.get('id'): pothole for pothole in stored}
+    return [dict(by_id.get(pothole['id'], {}), **pothole) for pothole in rescored]
+
+
+def summarize(potholes: List[Dict]) -> Dict:
+    """Aggregates stored on an analysis document."""
+    return {
+        'total_potholes': len(potholes),
+        'total_volume': sum(p['volume'] for p in potholes),
+    }
+
+
+def rescore_collection(collection, log_dir: str, profile: CameraProfile, query: Optional[Dict] = None,
+                       batch_size: int = 500, **options) -> int:
+    """Re-score every analysis in ``collection`` that has a detection log."""
+    from pymongo import UpdateOne
+
+    query = dict(query or {}, detection_log={'$exists': True})
+    updates, count = [], 0
+    for doc in collection.find(query, {'detection_log': 1, 'potholes': 1}):
+        detections, meta = load_log(os.path.join(log_dir, doc['detection_log']))
+        potholes = merge_rescored(doc.get('potholes', []), rescore_log(detections, meta, profile, **options))
+        updates.append(UpdateOne({'_id': doc['_id']}, {'$set': dict(
+            summarize(potholes), potholes=potholes, camera=profile.name)}))
+        if len(updates) >= batch_size:
+            collection.bulk_write(updates, ordered=False)
+            count += len(updates)
+            updates = []
+    if updates:
+        collection.bulk_write(updates, ordered=False)
+        count += len(updates)
+    return count
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Re-score stored analyses from their detection logs.")
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/pothole_detection"))
+    parser.add_argument("--log-dir", default=os.path.join("uploads", "detections"))
+    parser.add_argument("--camera", default=CAMERA_PROFILE)
+    parser.add_argument("--camera-config", default=CAMERA_CONFIG)
+    parser.add_argument("--aggregation", default=DEPTH_AGGREGATION, choices=AGGREGATIONS)
+    parser.add_argument("--topk", type=int, default=DEPTH_TOPK)
+    parser.add_argument("--percentile", type=float, default=DEPTH_PERCENTILE)
+    parser.add_argument("--severity", type=float, nargs=2, default=SEVERITY_THRESHOLDS,
+                        metavar=("MEDIUM", "HIGH"), help="volume thresholds in cm³")
+    parser.add_argument("--user-id", help="only re-score this user's analyses")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    profile = get_profile(args.camera, load_profiles(args.camera_config))
+    collection = MongoClient(args.mongo_uri).get_default_database().analysis_results
+    count = rescore_collection(
+        collection, args.log_dir, profile, {'user_id': args.user_id} if args.user_id else None,
+        aggregation=args.aggregation, k=args.topk, percentile=args.percentile,
+        severity_thresholds=args.severity)
+    print(f"Re-scored {count} analyses with camera '{profile.name}' and {args.aggregation} depth")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""One frame-processing path shared by every pothole pipeline.
+
+An :class:`InferenceEngine` combines three pluggable backends:
+
+* a detector with ``detect(frame) -> (ltrb boxes, confidences)``
+  (:class:`YoloDetector`, :class:`KerasDetector`);
+* an optional depth model with ``depth_map(frame) -> (H, W) array``
+  (:class:`MidasDepth`);
+* an optional tracker from :mod:`inference.trackers`. Without one every
+  detection is its own pothole, as for single images.
+
+:meth:`InferenceEngine.process_frame` detects, tracks, samples and aggregates
+depth, and measures on the ground plane, vectorized over all potholes in the
+frame. The Flask service, the streaming demo and the Keras ``PotholeDetector``
+only turn its :class:`FrameResult` into their own output formats.
+"""
+import os
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+import cv2
+import numpy as np
+
+from .calibration import CameraProfile, add_severity
+from .depth_stats import TrackDepthStats, sample_box_depths
+from .tiling import TILE_OVERLAP, TILE_SIZE, detect_tiled
+
+# Tiled inference: "on", "off", or "auto" (tile when the longest side >= TILE_MIN_SIDE)
+TILED_INFERENCE = os.getenv("TILED_INFERENCE", "auto")
+TILE_MIN_SIDE = int(os.getenv("TILE_MIN_SIDE", "3000"))
+
+
+def iter_frames(source: Union[str, os.PathLike, Iterable[np.ndarray]]) -> Iterator[np.ndarray]:
+    """Frames from a video path, or any iterable of frames passed through as-is."""
+    if not isinstance(source, (str, os.PathLike)):
+        yield from source
+        return
+    cap = cv2.VideoCapture(os.fspath(source))
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {source}")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def _empty_detections():
+    return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+
+class YoloDetector:
+    """Ultralytics YOLO backend, optionally tiled for high-resolution frames."""
+
+    def __init__(self, model, tiled: str = TILED_INFERENCE, tile_min_side: int = TILE_MIN_SIDE,
+                 tile_size: int = TILE_SIZE, tile_overlap: float = TILE_OVERLAP):
+        self.model = model
+        self.tiled = tiled
+        self.tile_min_side = tile_min_side
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+
+    def use_tiled(self, frame: np.ndarray, mode: Optional[str] = None) -> bool:
+        mode = (mode or self.tiled).lower()
+        if mode == "auto":
+            return max(frame.shape[:2]) >= self.tile_min_side
+        return mode in ("on", "true", "1")
+
+    def detect(self, frame: np.ndarray, tiled: Optional[str] = None):
+        if self.use_tiled(frame, tiled):
+            return detect_tiled(self.model, frame, self.tile_size, self.tile_overlap)
+        results = self.model(frame)
+        if not results:
+            return _empty_detections()
+        boxes = np.concatenate([result.boxes.xyxy.cpu().numpy() for result in results])
+        confidences = np.concatenate([result.boxes.conf.cpu().numpy() for result in results])
+        return boxes.reshape(-1, 4), confidences
+
+
+class KerasDetector:
+    """Adapter for the Keras ``PotholeDetector``: frame classifier plus contour localisation.
+
+    Every located region of a positive frame becomes a detection whose
+    confidence is the frame's classifier score.
+    """
+
+    def __init__(self, pothole_detector, threshold: float = 0.5):
+        self.pothole_detector = pothole_detector
+        self.threshold = threshold
+
+    def detect(self, frame: np.ndarray, **_):
+        score = float(np.asarray(self.pothole_detector.detect_potholes(frame)).ravel()[0])
+        if not score > self.threshold:
+            return _empty_detections()
+        ltwh = np.array(self.pothole_detector.locate_potholes(frame), dtype=np.float32).reshape(-1, 4)
+        boxes = np.hstack([ltwh[:, :2], ltwh[:, :2] + ltwh[:, 2:]])
+        return boxes, np.full(len(boxes), score, dtype=np.float32)
+
+
+class MidasDepth:
+    """MiDaS relative depth, resized back to the frame resolution."""
+
+    def __init__(self, model, transform, device):
+        self.model = model
+        self.transform = transform
+        self.device = device
+
+    @classmethod
+    def load(cls, model_type: str = "DPT_Hybrid", device=None) -> "MidasDepth":
+        import torch
+        model = torch.hub.load("intel-isl/MiDaS", model=model_type, pretrained=True)
+        transform = torch.hub.load("intel-isl/MiDaS", "transforms").small_transform
+        device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        model.to(device).eval()
+        return cls(model, transform, device)
+
+    def depth_map(self, frame: np.ndarray) -> np.ndarray:
+        import torch
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        input_batch = self.transform(frame_rgb).to(self.device)
+        with torch.no_grad():
+            prediction = self.model(input_batch)
+            prediction = torch.nn.functional.interpolate(
+                prediction.unsqueeze(1),
+                size=frame.shape[:2],
+                mode="bicubic",
+                align_corners=False,
+            ).squeeze()
+        return prediction.cpu().numpy()
+
+
+class FrameResult(NamedTuple):
+    """Everything measured in one frame; array rows line up with ``keys``."""
+
+    frame_size: tuple
+    detections: int  # raw detector boxes, before tracking
+    keys: List[Hashable]  # track IDs, or 1..N without a tracker
+    boxes: np.ndarray  # (N, 4) int ltrb
+    confidences: np.ndarray  # NaN where the tracker did not match a detection this frame
+    samples: np.ndarray  # this frame's raw depth sample per box (NaN if none)
+    raw_depths: np.ndarray  # aggregated raw depth (per track with a tracker)
+    depths: np.ndarray  # cm
+    lengths: np.ndarray  # cm
+    breadths: np.ndarray  # cm
+
+
+class InferenceEngine:
+    """Detector + depth + tracker + camera profile behind one ``process_frame`` call."""
+
+    def __init__(self, detector, profile: CameraProfile, depth=None,
+                 tracker_factory: Optional[Callable[[], object]] = None,
+                 depth_stats: Optional[TrackDepthStats] = None):
+        self.detector = detector
+        self.profile = profile
+        self.depth = depth
+        self.tracker_factory = tracker_factory
+        self.tracker = tracker_factory() if tracker_factory else None
+        self.depth_stats = depth_stats if depth_stats is not None else TrackDepthStats()
+
+    def reset(self) -> None:
+        """Start over with a fresh tracker and empty depth statistics."""
+        self.tracker = self.tracker_factory() if self.tracker_factory else None
+        self.depth_stats.clear()
+
+    def _track(self, frame: np.ndarray, boxes: np.ndarray, confidences: np.ndarray):
+        detections = [([x1, y1, x2 - x1, y2 - y1], float(conf), "pothole")
+                      for (x1, y1, x2, y2), conf in zip(boxes.tolist(), confidences)]
+        tracks = self.tracker.update_tracks(detections, frame=frame)
+        # Release depth rows of tracks the tracker has deleted.
+        self.depth_stats.retain(track.track_id for track in tracks)
+        confirmed = [track for track in tracks if track.is_confirmed()]
+        ltwh = np.array([track.to_ltwh() for track in confirmed], dtype=float).reshape(-1, 4).astype(int)
+        boxes = np.hstack([ltwh[:, :2], ltwh[:, :2] + ltwh[:, 2:]])
+        confidences = np.array([np.nan if getattr(track, "det_conf", None) is None else track.det_conf
+                                for track in confirmed], dtype=np.float32)
+        return [track.track_id for track in confirmed], boxes, confidences
+
+    def process_frame(self, frame: np.ndarray, skip_empty: bool = False, **detect_options) -> FrameResult:
+        """Run the whole pipeline on one BGR frame.
+
+        The depth model only runs when the frame has something to measure.
+        With ``skip_empty`` a frame without detections returns right after
+        the detector, without advancing the tracker; callers that reset on
+        such frames (:class:`~inference.adapters.StreamSession`) use it.
+        ``detect_options`` are passed to the detector (e.g. ``tiled``).
+        """
+        frame_size = (frame.shape[1], frame.shape[0])
+        boxes, confidences = self.detector.detect(frame, **detect_options)
+        boxes = np.asarray(boxes).reshape(-1, 4).astype(int)
+        confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        detections = len(boxes)
+
+        if self.tracker is not None and not (skip_empty and detections == 0):
+            keys, boxes, confidences = self._track(frame, boxes, confidences)
+        else:
+            keys = list(range(1, len(boxes) + 1))
+
+        if not keys:
+            empty = np.zeros(0, dtype=np.float64)
+            return FrameResult(frame_size, detections, [], boxes.reshape(0, 4), confidences,
+                               empty, empty, empty, empty, empty)
+
+        if self.depth is not None:
+            samples = sample_box_depths(self.depth.depth_map(frame), boxes)
+        else:
+            samples = np.full(len(keys), np.nan, dtype=np.float32)
+        if self.tracker is not None:
+            raw_depths = self.depth_stats.update(keys, samples)
+        else:
+            raw_depths = np.nan_to_num(samples)
+        lengths, breadths = self.profile.measure(boxes, frame_size)
+        return FrameResult(frame_size, detections, keys, boxes, confidences, samples, raw_depths,
+                           self.profile.depth(raw_depths), lengths, breadths)
+
+    def run_video(self, source, detection_log=None) -> List[Dict]:
+        """One record per tracked pothole: size from its first confirmed frame, depth from its latest."""
+        potholes: Dict[Hashable, Dict] = {}
+        for frame_idx, frame in enumerate(iter_frames(source)):
+            result = self.process_frame(frame)
+            if not result.keys:
+                continue
+
+            frame_size = list(result.frame_size)
+            for key, bbox, length_real, breadth_real in zip(result.keys, result.boxes, result.lengths, result.breadths):
+                if key not in potholes:
+                    potholes[key] = {
+                        'id': len(potholes) + 1,
+                        'length': float(length_real),
+                        'breadth': float(breadth_real),
+                        'bbox': bbox.tolist(),
+                        'frame_size': frame_size,
+                        'frame': frame_idx,
+                    }
+            for key, raw_depth, depth in zip(result.keys, result.raw_depths, result.depths):
+                pothole = potholes[key]
+                pothole['last_frame'] = frame_idx
+                pothole['raw_depth'] = float(raw_depth)
+                pothole['depth'] = float(depth)
+                pothole['volume'] = float(pothole['length'] * pothole['breadth'] * depth)
+
+            if detection_log is not None:
+                detection_log.meta['frame_size'] = frame_size
+                detection_log.append(frame_idx, [potholes[key]['id'] for key in result.keys],
+                                     result.boxes, result.confidences, result.samples)
+        return add_severity(list(potholes.values()))
+
+    def run_image(self, frame: np.ndarray, detection_log=None, **detect_options) -> List[Dict]:
+        """One record per detection in a single image."""
+        result = self.process_frame(frame, **detect_options)
+        frame_size = list(result.frame_size)
+        potholes = []
+        for key, bbox, conf, length_real, breadth_real, raw_depth, depth in zip(
+                result.keys, result.boxes, result.confidences, result.lengths, result.breadths,
+                result.raw_depths, result.depths):
+            potholes.append({
+                'id': key,
+                'length': float(length_real),
+                'breadth': float(breadth_real),
+                'depth': float(depth),
+                'volume': float(length_real * breadth_real * depth),
+                'confidence': float(conf),
+                'bbox': bbox.tolist(),
+                'raw_depth': float(raw_depth),
+                'frame_size': frame_size
+            })
+
+        if detection_log is not None:
+            detection_log.meta['frame_size'] = frame_size
+            detection_log.append(0, [p['id'] for p in potholes], result.boxes, result.confidences, result.raw_depths)
+        return add_severity(potholes)
@@ -0,0 +1,234 @@
+"""GPS tracks and per-frame locations for survey videos.
+
+A video upload can come with a GPS sidecar: a GPX file, or a CSV with a time
+column (seconds, or ISO timestamps) and latitude/longitude columns::
+
+    time,lat,lon
+    0.0,19.07283,72.88261
+    1.0,19.07291,72.88270
+
+:class:`GpsTrack` interpolates a position and a direction of travel for any
+video timestamp, so every frame, and every pothole, gets a location. With a
+calibrated camera profile a pothole is placed on the road where the camera
+saw it, not where the vehicle was.
+"""
+import csv
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = 111320.0
+
+TIME_COLUMNS = ("time", "timestamp", "t", "seconds", "elapsed")
+LAT_COLUMNS = ("lat", "latitude")
+LON_COLUMNS = ("lon", "lng", "long", "longitude")
+# Fixes closer than this are GPS jitter, not movement, and give no heading.
+MIN_HEADING_M = 1.0
+
+
+def haversine_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in meters; arguments broadcast like NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def bearing_rad(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Initial great-circle bearing from point 1 to point 2, radians clockwise from north."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    return np.arctan2(np.sin(dlon) * np.cos(lat2),
+                      np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon))
+
+
+def offset_position(lat, lon, heading, forward_m, right_m) -> Tuple[np.ndarray, np.ndarray]:
+    """Move points ``forward_m`` along ``heading`` (radians) and ``right_m`` to its right.
+
+    A local flat-earth step, fine for the tens of meters a camera sees.
+    """
+    lat, lon, heading, forward_m, right_m = (np.asarray(v, dtype=np.float64)
+                                             for v in (lat, lon, heading, forward_m, right_m))
+    north = forward_m * np.cos(heading) - right_m * np.sin(heading)
+    east = forward_m * np.sin(heading) + right_m * np.cos(heading)
+    cos_lat = np.maximum(np.cos(np.radians(lat)), 1e-6)
+    return lat + north / METERS_PER_DEGREE, lon + east / (METERS_PER_DEGREE * cos_lat)
+
+
+def parse_bbox(text: str) -> Tuple[float, float, float, float]:
+    """``min_lon,min_lat,max_lon,max_lat`` as floats; ValueError unless it is a valid box.
+
+    Boxes are at most 180 degrees wide and do not cross the antimeridian.
+    """
+    parts = text.split(",")
+    if len(parts) != 4:
+        raise ValueError("bbox=min_lon,min_lat,max_lon,max_lat is required")
+    min_lon, min_lat, max_lon, max_lat = (float(part) for part in parts)
+    if not -180 <= min_lon < max_lon <= 180:
+        raise ValueError("bbox longitudes must satisfy -180 <= min_lon < max_lon <= 180")
+    if max_lon - min_lon > 180:
+        # A wider GeoJSON box selects the rest of the globe; -180..180 is a degenerate ring.
+        raise ValueError("bbox must be at most 180 degrees of longitude wide; split wider boxes")
+    if not -90 <= min_lat < max_lat <= 90:
+        raise ValueError("bbox latitudes must satisfy -90 <= min_lat < max_lat <= 90")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def _parse_time(value: str) -> float:
+    """Seconds as a float, or an ISO-8601 timestamp as POSIX seconds."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class GpsTrack:
+    """Time-sorted GPS fixes; ``times`` are seconds from the start of the video."""
+
+    def __init__(self, times: Sequence[float], latitudes: Sequence[float], longitudes: Sequence[float]):
+        times = np.asarray(times, dtype=np.float64)
+        if len(times) == 0:
+            raise ValueError("GPS track has no points")
+        order = np.argsort(times, kind="stable")
+        self.times = times[order]
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)[order]
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)[order]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def locate(self, seconds) -> Tuple[np.ndarray, np.ndarray]:
+        """Interpolated (latitudes, longitudes) at video times; clamped to the track's ends."""
+        seconds = np.asarray(seconds, dtype=np.float64)
+        return np.interp(seconds, self.times, self.latitudes), np.interp(seconds, self.times, self.longitudes)
+
+    def locate_frames(self, frame_indices, fps: float) -> Tuple[np.ndarray, np.ndarray]:
+        return self.locate(np.asarray(frame_indices, dtype=np.float64) / (fps or 30.0))
+
+    def headings(self, seconds) -> np.ndarray:
+        """Direction of travel at video times, radians clockwise from north.
+
+        Each time takes the bearing of the track segment it falls in; a
+        segment shorter than ``MIN_HEADING_M`` (standing still) takes the
+        bearing of the nearest earlier moving segment, or the first one.
+        NaN if the track never moves.
+        """
+        seconds = np.asarray(seconds, dtype=np.float64)
+        lats, lons = self.latitudes, self.longitudes
+        moving = haversine_m(lats[:-1], lons[:-1], lats[1:], lons[1:]) >= MIN_HEADING_M
+        if not moving.any():
+            return np.full(seconds.shape, np.nan)
+        bearings = bearing_rad(lats[:-1], lons[:-1], lats[1:], lons[1:])
+        source = np.maximum.accumulate(np.where(moving, np.arange(len(moving)), -1))
+        source[source < 0] = np.argmax(moving)
+        segment = np.clip(np.searchsorted(self.times, seconds, side="right") - 1, 0, len(moving) - 1)
+        return bearings[source][segment]
+
+    def headings_frames(self, frame_indices, fps: float) -> np.ndarray:
+        return self.headings(np.asarray(frame_indices, dtype=np.float64) / (fps or 30.0))
+
+
+def _column(fieldnames: Sequence[str], candidates: Sequence[str]) -> Optional[str]:
+    lowered = {name.strip().lower(): name for name in fieldnames}
+    return next((lowered[c] for c in candidates if c in lowered), None)
+
+
+def read_csv_track(path: str) -> Tuple[List[float], List[float], List[float]]:
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        time_col, lat_col, lon_col = (_column(fields, c) for c in (TIME_COLUMNS, LAT_COLUMNS, LON_COLUMNS))
+        if lat_col is None or lon_col is None:
+            raise ValueError(f"GPS CSV needs latitude and longitude columns, got: {', '.join(fields)}")
+        times, lats, lons = [], [], []
+        for i, row in enumerate(reader):
+            if not row.get(lat_col) or not row.get(lon_col):
+                continue
+            times.append(_parse_time(row[time_col]) if time_col else float(i))
+            lats.append(float(row[lat_col]))
+            lons.append(float(row[lon_col]))
+    return times, lats, lons
+
+
+def read_gpx_track(path: str) -> Tuple[List[float], List[float], List[float]]:
+    times, lats, lons = [], [], []
+    point_time = None
+    for _, elem in ET.iterparse(path, events=("end",)):
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if tag == "time":
+            point_time = elem.text
+        elif tag in ("trkpt", "rtept", "wpt"):
+            if elem.get("lat") is None or elem.get("lon") is None:
+                raise ValueError(f"GPX <{tag}> without lat/lon attributes")
+            lats.append(float(elem.get("lat")))
+            lons.append(float(elem.get("lon")))
+            times.append(_parse_time(point_time) if point_time else float(len(times)))
+            point_time = None
+            elem.clear()
+    return times, lats, lons
+
+
+def load_track(path: str, offset: float = 0.0) -> GpsTrack:
+    """Read a GPX or CSV sidecar.
+
+    Times are made relative to the first fix, then shifted by ``offset``:
+    the video time (seconds) at which that first fix was taken.
+    """
+    if os.path.splitext(path)[1].lower() == ".gpx":
+        times, lats, lons = read_gpx_track(path)
+    else:
+        times, lats, lons = read_csv_track(path)
+    if not times:
+        raise ValueError(f"No GPS points in {os.path.basename(path)}")
+    times = np.asarray(times, dtype=np.float64)
+    return GpsTrack(times - times.min() + offset, lats, lons)
+
+
+def ground_offsets(potholes: List[Dict], profile) -> np.ndarray:
+    """``(N, 2)`` road-plane (right, forward) offsets in meters of each record's ``bbox`` from the camera.
+
+    The offset is the middle of the box's footprint: the ground points of
+    the centres of its bottom and top edges, or the bottom one alone when
+    the top is above the horizon. NaN without a calibrated ``profile``,
+    a ``bbox``, or a footprint on the road.
+    """
+    offsets = np.full((len(potholes), 2), np.nan)
+    if profile is None or not profile.calibrated:
+        return offsets
+    for i, pothole in enumerate(potholes):
+        if "bbox" not in pothole:
+            continue
+        x1, y1, x2, y2 = pothole["bbox"]
+        bottom, top = profile.ground_points([[(x1 + x2) / 2, y2], [(x1 + x2) / 2, y1]], pothole.get("frame_size"))
+        offsets[i] = bottom if np.isnan(top).any() else (bottom + top) / 2
+    return offsets
+
+
+def locate_potholes(potholes: List[Dict], track: GpsTrack, fps: float, profile=None) -> List[Dict]:
+    """Add ``location`` to video pothole records in place.
+
+    With a calibrated camera ``profile`` a pothole is placed where its box
+    (``bbox``, from its first frame) lies on the road: the vehicle position
+    at that frame moved by the box's ground-plane offset along the direction
+    of travel, so potholes side by side in one frame get distinct locations.
+    Otherwise, or while the track gives no heading, it is placed where the
+    vehicle was when the pothole was last seen: the camera looks ahead, so
+    the last sighting is the closest one.
+    """
+    frames = [p.get("last_frame", p.get("frame", 0)) for p in potholes]
+    lats, lons = track.locate_frames(frames, fps)
+    offsets = ground_offsets(potholes, profile)
+    first = np.array([p.get("frame", 0) for p in potholes], dtype=np.float64)
+    headings = track.headings_frames(first, fps)
+    placed = ~(np.isnan(offsets).any(axis=1) | np.isnan(headings))
+    if placed.any():
+        at_lat, at_lon = track.locate_frames(first[placed], fps)
+        lats[placed], lons[placed] = offset_position(at_lat, at_lon, headings[placed],
+                                                     offsets[placed, 1], offsets[placed, 0])
+    for pothole, lat, lon in zip(potholes, lats, lons):
+        pothole["location"] = {"latitude": float(lat), "longitude": float(lon)}
+    return potholes
@@ -0,0 +1,83 @@
+"""Threshold-based pothole localisation for the Keras pipeline.
+
+The Keras classifier only says whether a frame contains a pothole; boxes come
+from blurring, thresholding and keeping the outer contours of large bright
+regions. :func:`locate_contours` is the original full-resolution loop, kept
+as the reference. :func:`locate_regions` can run the same steps on a frame
+downscaled to ``LOCALIZE_WIDTH``, with the blur and the area test converted
+so they match what the reference would see at full resolution.
+
+Downscaling is off by default (``LOCALIZE_WIDTH=0``): the full-resolution
+path is exact, and on dataset images (``python -m inference.benchmark
+localize``) downscaling to 960 px kept only 0.94 of the 1080p and 0.84-0.88
+of the 4K boxes, while 720p got slower. Set it only where speed matters more
+than recall on frames at least twice as wide.
+"""
+import os
+
+import cv2
+import numpy as np
+
+LOCALIZE_WIDTH = int(os.getenv("LOCALIZE_WIDTH", "0"))  # 0: full resolution
+
+
+def locate_contours(frame: np.ndarray, threshold: int = 60, blur: int = 11, min_area: float = 500) -> np.ndarray:
+    """Full-resolution ``findContours`` localisation; ``(N, 4)`` ltwh boxes."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.GaussianBlur(gray, (blur, blur), 0)
+    thresh = cv2.threshold(blurred, threshold, 255, cv2.THRESH_BINARY)[1]
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = [cv2.boundingRect(contour) for contour in contours if cv2.contourArea(contour) > min_area]
+    return np.array(boxes, dtype=np.int64).reshape(-1, 4)
+
+
+def _gaussian_sigma(ksize: int) -> float:
+    """The sigma ``cv2.GaussianBlur`` derives from a ``ksize`` kernel when given sigma 0."""
+    return 0.3 * ((ksize - 1) * 0.5 - 1) + 0.8
+
+
+def locate_regions(frame: np.ndarray, threshold: int = 60, blur: int = 11, min_area: float = 500,
+                   max_width: int = LOCALIZE_WIDTH) -> np.ndarray:
+    """Bright regions larger than ``min_area`` full-resolution pixels; ``(N, 4)`` ltwh boxes.
+
+    Frames at least twice as wide as ``max_width`` are downscaled to it
+    first and boxes are mapped back to full-resolution coordinates; below
+    that the saving does not pay for the resize and the lost recall. Without
+    downscaling the result is exactly :func:`locate_contours`.
+    """
+    height, width = frame.shape[:2]
+    scale = max_width / width if max_width and width >= 2 * max_width else 1.0
+    # Grayscale first: downscaling one channel is about three times cheaper than three.
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+        # Same blur width as the full-resolution kernel, in downscaled pixels.
+        sigma = _gaussian_sigma(blur) * scale
+        kernel = 2 * int(np.ceil(3 * sigma)) + 1
+    else:
+        sigma, kernel = 0, blur
+    blurred = cv2.GaussianBlur(gray, (kernel, kernel), sigma)
+    thresh = cv2.threshold(blurred, threshold, 255, cv2.THRESH_BINARY)[1]
+
+    # RETR_EXTERNAL: holes belong to their region, as in the reference.
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    if not contours:
+        return np.zeros((0, 4), dtype=np.int64)
+    # contourArea is a polygon through boundary pixel centres, about half a pixel
+    # per boundary pixel smaller than the region. That margin does not scale with
+    # the area, so convert it separately to estimate the full-resolution contourArea.
+    area = np.array([cv2.contourArea(contour) for contour in contours])
+    boundary = np.array([len(contour) for contour in contours], dtype=np.float64)
+    full_area = (area + boundary / 2) / (scale * scale) - boundary / (2 * scale)
+    boxes = np.array([cv2.boundingRect(contour) for contour, keep in zip(contours, full_area > min_area) if keep],
+                     dtype=np.float64).reshape(-1, 4)
+    if scale == 1.0:
+        return boxes.astype(np.int64)
+
+    sx, sy = gray.shape[1] / width, gray.shape[0] / height
+    x1 = np.floor(boxes[:, 0] / sx)
+    y1 = np.floor(boxes[:, 1] / sy)
+    x2 = np.minimum(np.ceil((boxes[:, 0] + boxes[:, 2]) / sx), width)
+    y2 = np.minimum(np.ceil((boxes[:, 1] + boxes[:, 3]) / sy), height)
+    return np.stack([x1, y1, x2 - x1, y2 - y1], axis=1).astype(np.int64)
@@ -0,0 +1,170 @@
+"""Deduplicated, geo-indexed pothole store.
+
+Every analysis document in ``analysis_results`` keeps its own pothole list, so
+surveying the same road twice stores the same pothole twice. This store keeps
+one document per physical pothole in a ``potholes`` collection with a
+``2dsphere`` index on ``location``::
+
+    {"location": {"type": "Point", "coordinates": [lon, lat]},
+     "observations": 3, "length": ..., "breadth": ..., "depth": ..., "volume": ...,
+     "first_seen": ..., "last_seen": ..., "last_source": {...}}
+
+An observation within ``radius_m`` of a stored pothole is merged into it:
+its location and measurements become running means. Observations from the
+same upload merge too (one pothole seen on two passes of the same drive);
+potholes side by side in one frame stay apart because
+:func:`~inference.geo.locate_potholes` places each on the road where the
+camera saw it. Every observation costs one indexed ``$nearSphere`` query, a
+batch one ``bulk_write``. Bounding-box queries use the same index.
+"""
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .geo import haversine_m
+
+MERGE_RADIUS_M = float(os.getenv("POTHOLE_MERGE_RADIUS_M", "3.0"))
+MEASUREMENTS = ('length', 'breadth', 'depth', 'volume')
+# Bounding-box queries: boxes at most half the globe wide, whose polygon has a
+# vertex per degree along the parallels. A 1 degree great-circle edge bows
+# about 0.001 degrees off its parallel, well inside the padding.
+MAX_BOX_WIDTH_DEG = 180.0
+BOX_EDGE_STEP_DEG = 1.0
+BOX_EDGE_PAD_DEG = 0.01
+
+
+def box_polygon(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> Dict:
+    """GeoJSON polygon containing a lon/lat box.
+
+    GeoJSON edges are great circles, which bow away from the box's parallels,
+    so those edges get a vertex every ``BOX_EDGE_STEP_DEG`` of longitude and
+    are pushed out by ``BOX_EDGE_PAD_DEG``. The polygon is slightly larger
+    than the box; :meth:`PotholeStore.within_bbox` trims it to the exact ranges.
+    """
+    steps = max(1, int(np.ceil((max_lon - min_lon) / BOX_EDGE_STEP_DEG)))
+    lons = np.linspace(min_lon, max_lon, steps + 1).tolist()
+    # Stop short of the poles, where every vertex of a parallel is the same point.
+    south, north = max(min_lat - BOX_EDGE_PAD_DEG, -89.9), min(max_lat + BOX_EDGE_PAD_DEG, 89.9)
+    ring = [[lon, south] for lon in lons] + [[lon, north] for lon in reversed(lons)]
+    return {'type': 'Polygon', 'coordinates': [ring + [ring[0]]]}
+
+
+class PotholeStore:
+    """One document per physical pothole in a MongoDB collection."""
+
+    def __init__(self, collection, radius_m: float = MERGE_RADIUS_M):
+        self.collection = collection
+        self.radius_m = radius_m
+        self._indexed = False
+
+    def ensure_indexes(self) -> None:
+        if not self._indexed:
+            self.collection.create_index([('location', '2dsphere')])
+            self.collection.create_index('last_seen')
+            self._indexed = True
+
+    def _nearby(self, lat: float, lon: float) -> List[Dict]:
+        """Stored potholes within ``radius_m`` of a point, nearest first."""
+        point = {'type': 'Point', 'coordinates': [float(lon), float(lat)]}
+        projection = dict.fromkeys(('location', 'observations') + MEASUREMENTS, 1)
+        return list(self.collection.find(
+            {'location': {'$nearSphere': {'$geometry': point, '$maxDistance': self.radius_m}}}, projection))
+
+    def add_observations(self, potholes: List[Dict], seen_at: Optional[datetime] = None,
+                         source: Optional[Dict] = None) -> Dict[str, int]:
+        """Merge located pothole records into the store.
+
+        Each record with a ``location`` gets the ``pothole_id`` it was merged
+        into. Returns how many potholes were created and how many
+        observations were merged into a stored or earlier one.
+        """
+        from bson import ObjectId
+        from pymongo import InsertOne, UpdateOne
+
+        located = [p for p in potholes if p.get('location')]
+        if not located:
+            return {'created': 0, 'merged': 0}
+        self.ensure_indexes()
+        seen_at = seen_at or datetime.now()
+
+        # Potholes this batch touched, by _id: stored ones as first returned by a
+        # query, then updated in memory, and the ones it created.
+        clusters: Dict = {}
+        created = merged = 0
+        for pothole in located:
+            lat, lon = float(pothole['location']['latitude']), float(pothole['location']['longitude'])
+            for doc in self._nearby(lat, lon):
+                if doc['_id'] not in clusters:
+                    c_lon, c_lat = doc['location']['coordinates']
+                    clusters[doc['_id']] = {'doc': doc, 'new': False, 'changed': False, 'lat': c_lat, 'lon': c_lon,
+                                            'n': doc.get('observations', 1),
+                                            **{k: doc.get(k, 0.0) for k in MEASUREMENTS}}
+            # Running means move potholes, so check the distance to their current positions.
+            candidates = list(clusters.values())
+            distances = haversine_m(lat, lon, [c['lat'] for c in candidates], [c['lon'] for c in candidates])
+            if len(candidates) and distances.min() <= self.radius_m:
+                cluster = candidates[int(distances.argmin())]
+                n = cluster['n']
+                cluster['lat'] = (cluster['lat'] * n + lat) / (n + 1)
+                cluster['lon'] = (cluster['lon'] * n + lon) / (n + 1)
+                for key in MEASUREMENTS:
+                    cluster[key] = (cluster[key] * n + float(pothole.get(key, 0.0))) / (n + 1)
+                cluster['n'] = n + 1
+                cluster['changed'] = True
+                merged += 1
+            else:
+                cluster = {'doc': {'_id': ObjectId(), 'first_seen': seen_at}, 'new': True, 'changed': True,
+                           'lat': lat, 'lon': lon, 'n': 1, **{k: float(pothole.get(k, 0.0)) for k in MEASUREMENTS}}
+                clusters[cluster['doc']['_id']] = cluster
+                created += 1
+            pothole['pothole_id'] = str(cluster['doc']['_id'])
+
+        operations = []
+        for cluster in clusters.values():
+            if not cluster['changed']:
+                continue
+            fields = {
+                'location': {'type': 'Point', 'coordinates': [float(cluster['lon']), float(cluster['lat'])]},
+                'observations': cluster['n'],
+                'last_seen': seen_at,
+                'last_source': source or {},
+                **{k: float(cluster[k]) for k in MEASUREMENTS},
+            }
+            if cluster['new']:
+                operations.append(InsertOne(dict(cluster['doc'], **fields)))
+            else:
+                operations.append(UpdateOne({'_id': cluster['doc']['_id']}, {'$set': fields}))
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        return {'created': created, 'merged': merged}
+
+    def within_bbox(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float,
+                    limit: int = 1000, min_observations: int = 1) -> List[Dict]:
+        """Stored potholes inside a lon/lat bounding box, most observed first.
+
+        The index narrows the search to :func:`box_polygon`; the numeric
+        ranges on the coordinates keep exactly the box. Boxes wider than
+        ``MAX_BOX_WIDTH_DEG`` are rejected with ValueError: their polygon
+        would select the rest of the globe instead.
+        """
+        if not 0 < max_lon - min_lon <= MAX_BOX_WIDTH_DEG:
+            raise ValueError(f"bbox must be between 0 and {MAX_BOX_WIDTH_DEG:g} degrees of longitude wide")
+        query = {
+            'location': {'$geoWithin': {'$geometry': box_polygon(min_lon, min_lat, max_lon, max_lat)}},
+            'location.coordinates.0': {'$gte': min_lon, '$lte': max_lon},
+            'location.coordinates.1': {'$gte': min_lat, '$lte': max_lat},
+        }
+        if min_observations > 1:
+            query['observations'] = {'$gte': min_observations}
+        cursor = self.collection.find(query).sort('observations', -1).limit(limit)
+        return [{
+            'id': str(doc['_id']),
+            'latitude': doc['location']['coordinates'][1],
+            'longitude': doc['location']['coordinates'][0],
+            'observations': doc.get('observations', 1),
+            'first_seen': doc.get('first_seen'),
+            'last_seen': doc.get('last_seen'),
+            **{k: doc.get(k) for k in MEASUREMENTS},
+        } for doc in cursor]
@@ -0,0 +1,50 @@
+"""Weight-free detector and depth backends plus a synthetic clip.
+
+Used by the engine tests (``backend/tests``) and ``inference.benchmark``,
+so both run anywhere NumPy and OpenCV are installed.
+"""
+from typing import List, Sequence
+
+import cv2
+import numpy as np
+
+
+class BlobDetector:
+    """Synthetic detector: bright connected regions above ``min_area`` pixels."""
+
+    def __init__(self, threshold: int = 128, min_area: int = 200):
+        self.threshold = threshold
+        self.min_area = min_area
+
+    def detect(self, frame: np.ndarray, **_):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        _, _, stats, _ = cv2.connectedComponentsWithStats((gray > self.threshold).astype(np.uint8))
+        stats = stats[1:][stats[1:, cv2.CC_STAT_AREA] >= self.min_area]
+        boxes = np.column_stack([stats[:, 0], stats[:, 1], stats[:, 0] + stats[:, 2], stats[:, 1] + stats[:, 3]])
+        confidences = np.clip(stats[:, cv2.CC_STAT_AREA] / (stats[:, 2] * stats[:, 3]), 0, 1)
+        return boxes.astype(np.float32).reshape(-1, 4), confidences.astype(np.float32)
+
+
+class IntensityDepth:
+    """Synthetic depth: grayscale intensity, with zero (invalid) depth in dark areas."""
+
+    def depth_map(self, frame: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        gray[gray < 40] = 0
+        return gray * 10
+
+
+def synthetic_clip(n_frames: int = 30, size: Sequence[int] = (640, 360), seed: int = 0) -> List[np.ndarray]:
+    """Dark road with a few bright potholes drifting across it."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    blobs = [(rng.uniform(0, width * 0.6), rng.uniform(0, height * 0.6), rng.uniform(30, 90), rng.uniform(20, 60),
+              rng.uniform(-4, 4), rng.uniform(-2, 2), rng.integers(150, 255)) for _ in range(3)]
+    frames = []
+    for t in range(n_frames):
+        frame = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+        for x, y, w, h, vx, vy, level in blobs:
+            x1, y1 = int(x + vx * t), int(y + vy * t)
+            frame[max(y1, 0):max(y1 + int(h), 0), max(x1, 0):max(x1 + int(w), 0)] = level - (t % 5)
+        frames.append(frame)
+    return frames
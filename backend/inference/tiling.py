@@ -0,0 +1,135 @@
+"""Tiled YOLO inference for high-resolution survey imagery.
+
+``model(frame)`` letterboxes the whole frame down to the network input size,
+so small potholes in 4K images shrink to a few pixels. ``detect_tiled`` runs
+the detector on overlapping full-resolution tiles in batches, shifts the boxes
+back to frame coordinates, suppresses duplicates with IoU NMS and fuses
+potholes cut in two by a tile seam.
+"""
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+TILE_SIZE = int(os.getenv("TILE_SIZE", "640"))
+TILE_OVERLAP = float(os.getenv("TILE_OVERLAP", "0.2"))
+TILE_BATCH = int(os.getenv("TILE_BATCH", "8"))
+
+
+def tile_grid(width: int, height: int, tile_size: int = TILE_SIZE, overlap: float = TILE_OVERLAP) -> np.ndarray:
+    """Top-left aligned ltrb tiles covering the frame; the last row/column is flush with the edge."""
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length: int) -> np.ndarray:
+        if length <= tile_size:
+            return np.array([0])
+        points = np.arange(0, length - tile_size, stride)
+        return np.append(points, length - tile_size)
+
+    xs, ys = starts(width), starts(height)
+    x1, y1 = np.meshgrid(xs, ys)
+    x1, y1 = x1.ravel(), y1.ravel()
+    return np.stack([x1, y1, np.minimum(x1 + tile_size, width), np.minimum(y1 + tile_size, height)], axis=1)
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of two broadcastable ``(..., 4)`` ltrb arrays; empty boxes give 0."""
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = np.clip(a[..., 2] - a[..., 0], 0, None) * np.clip(a[..., 3] - a[..., 1], 0, None)
+    area_b = np.clip(b[..., 2] - b[..., 0], 0, None) * np.clip(b[..., 3] - b[..., 1], 0, None)
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+def seam_matches(boxes: np.ndarray, sources: np.ndarray, tiles: np.ndarray, threshold: float) -> np.ndarray:
+    """``(N, N)`` mask of box pairs that are one object cut by a tile seam.
+
+    Two boxes from different tiles can only share the strip where their tiles
+    overlap. Both are clipped to that strip and match if the clipped parts
+    have an IoU of at least ``threshold``. Boxes with a negative source (the
+    whole-frame pass) never match.
+    """
+    sources = np.asarray(sources)
+    from_tile = sources >= 0
+    tile_of = np.asarray(tiles, dtype=np.float64)[np.where(from_tile, sources, 0)]
+    strip = np.concatenate([np.maximum(tile_of[:, None, :2], tile_of[None, :, :2]),
+                            np.minimum(tile_of[:, None, 2:], tile_of[None, :, 2:])], axis=-1)
+    lo, hi = strip[..., [0, 1, 0, 1]], strip[..., [2, 3, 2, 3]]
+    clipped_i = np.clip(np.broadcast_to(boxes[:, None, :], strip.shape), lo, hi)
+    clipped_j = np.clip(np.broadcast_to(boxes[None, :, :], strip.shape), lo, hi)
+    different = from_tile[:, None] & from_tile[None, :] & (sources[:, None] != sources[None, :])
+    return different & (box_iou(clipped_i, clipped_j) >= threshold)
+
+
+def merge_boxes(boxes: np.ndarray, scores: np.ndarray, threshold: float = 0.5,
+                sources: Optional[np.ndarray] = None, tiles: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Greedy IoU non-maximum suppression across tiles, fusing seam-cut potholes.
+
+    A box is suppressed by a higher-scoring box with an IoU of at least
+    ``threshold``. With ``sources`` (tile index per box, -1 for the
+    whole-frame pass) and ``tiles``, a pothole cut by a tile seam is also
+    fused with its other half from the neighbouring tile (see
+    :func:`seam_matches`) and the kept box grows to their union. Nothing else
+    is grown, so small potholes inside a large box stay separate.
+    """
+    if not len(boxes):
+        return boxes.reshape(0, 4), scores.reshape(0)
+    order = np.argsort(-scores, kind="stable")
+    boxes, scores = boxes[order].astype(np.float64), scores[order]
+    duplicate = box_iou(boxes[:, None, :], boxes[None, :, :]) >= threshold
+    if sources is not None and tiles is not None:
+        seam = seam_matches(boxes, np.asarray(sources)[order], tiles, threshold)
+    else:
+        seam = np.zeros_like(duplicate)
+
+    alive = np.ones(len(boxes), dtype=bool)
+    kept_boxes, kept_scores = [], []
+    for i in range(len(boxes)):
+        if not alive[i]:
+            continue
+        fused = alive & seam[i]
+        fused[i] = True
+        members = boxes[fused]
+        kept_boxes.append([members[:, 0].min(), members[:, 1].min(), members[:, 2].max(), members[:, 3].max()])
+        kept_scores.append(scores[i])
+        alive &= ~(fused | duplicate[i])
+    return np.asarray(kept_boxes), np.asarray(kept_scores)
+
+
+def detect_tiled(model, frame: np.ndarray, tile_size: int = TILE_SIZE, overlap: float = TILE_OVERLAP,
+                 batch_size: int = TILE_BATCH, merge_threshold: float = 0.5, full_frame: bool = True,
+                 conf: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Run ``model`` over overlapping tiles and return merged ``(boxes_xyxy, confidences)``.
+
+    With ``full_frame`` a downscaled whole-frame pass is added so potholes
+    larger than a tile are still found in one piece.
+    """
+    height, width = frame.shape[:2]
+    tiles = tile_grid(width, height, tile_size, overlap)
+    crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+    offsets = tiles[:, [0, 1, 0, 1]].astype(np.float32)
+    crop_sources = np.arange(len(tiles))
+    if full_frame and len(tiles) > 1:
+        crops.append(frame)
+        offsets = np.vstack([offsets, np.zeros((1, 4), dtype=np.float32)])
+        crop_sources = np.append(crop_sources, -1)
+
+    kwargs = {"verbose": False}
+    if conf is not None:
+        kwargs["conf"] = conf
+    all_boxes, all_scores, all_sources = [], [], []
+    for start in range(0, len(crops), batch_size):
+        results = model(crops[start:start + batch_size], **kwargs)
+        for offset, source, result in zip(offsets[start:start + batch_size],
+                                          crop_sources[start:start + batch_size], results):
+            all_boxes.append(result.boxes.xyxy.cpu().numpy() + offset)
+            all_scores.append(result.boxes.conf.cpu().numpy())
+            all_sources.append(np.full(len(all_scores[-1]), source))
+
+    boxes = np.concatenate(all_boxes) if all_boxes else np.zeros((0, 4), dtype=np.float32)
+    scores = np.concatenate(all_scores) if all_scores else np.zeros(0, dtype=np.float32)
+    sources = np.concatenate(all_sources) if all_sources else np.zeros(0, dtype=int)
+    boxes, scores = merge_boxes(boxes, scores, merge_threshold, sources, tiles)
+    boxes = np.clip(boxes, 0, [width, height, width, height])
+    return boxes.reshape(-1, 4), scores
@@ -0,0 +1,233 @@
+"""Multi-object trackers used by the pothole video pipelines.
+
+Every backend exposes ``update(detections, frame=None)`` taking DeepSORT-style
+detections ``([left, top, width, height], confidence, class_name)`` and
+returning track objects with ``track_id``, ``is_confirmed()`` and
+``to_ltwh()``, so the processing loops do not care which one is in use.
+"""
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Detection = Tuple[Sequence[float], float, str]
+
+DEFAULT_TRACKER = os.getenv("TRACKER_BACKEND", "deepsort")
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two (N, 4) / (M, 4) arrays of ltrb boxes."""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0).astype(np.float32)
+
+
+def greedy_match(iou: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Greedily pair rows and columns by descending IoU above ``threshold``."""
+    if iou.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    matched_rows, matched_cols = [], []
+    used_rows, used_cols = set(), set()
+    for r, c in zip(rows[order], cols[order]):
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matched_rows.append(r)
+        matched_cols.append(c)
+    return np.asarray(matched_rows, dtype=np.int64), np.asarray(matched_cols, dtype=np.int64)
+
+
+class Track:
+    """Read-only view of one track, mirroring the DeepSORT track API."""
+
+    def __init__(self, track_id: str, ltwh: np.ndarray, confirmed: bool, det_conf: Optional[float]):
+        self.track_id = track_id
+        self._ltwh = ltwh
+        self._confirmed = confirmed
+        self.det_conf = det_conf
+
+    def is_confirmed(self) -> bool:
+        return self._confirmed
+
+    def to_ltwh(self) -> np.ndarray:
+        return self._ltwh.copy()
+
+    def to_ltrb(self) -> np.ndarray:
+        l, t, w, h = self._ltwh
+        return np.array([l, t, l + w, t + h])
+
+
+class IouKalmanTracker:
+    """SORT/ByteTrack-style tracker: constant-velocity Kalman + IoU matching.
+
+    All track state lives in stacked arrays so prediction, association and
+    correction run as a handful of NumPy operations per frame regardless of
+    how many potholes are on screen. No appearance model is evaluated.
+    """
+
+    # State: [cx, cy, w, h, vcx, vcy, vw, vh]
+    _F = np.eye(8)
+    _F[:4, 4:] = np.eye(4)
+
+    def __init__(self, max_age: int = 30, n_init: int = 3, iou_threshold: float = 0.3,
+                 high_conf: float = 0.4, low_conf: float = 0.1):
+        self.max_age = max_age
+        self.n_init = n_init
+        self.iou_threshold = iou_threshold
+        self.high_conf = high_conf
+        self.low_conf = low_conf
+        self._next_id = 1
+        self._x = np.zeros((0, 8))
+        self._P = np.zeros((0, 8, 8))
+        self._ids: List[str] = []
+        self._hits = np.zeros(0, dtype=np.int64)
+        self._age = np.zeros(0, dtype=np.int64)
+        self._conf = np.zeros(0)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @staticmethod
+    def _ltwh_to_z(ltwh: np.ndarray) -> np.ndarray:
+        return np.column_stack([ltwh[:, 0] + ltwh[:, 2] / 2, ltwh[:, 1] + ltwh[:, 3] / 2, ltwh[:, 2], ltwh[:, 3]])
+
+    def _ltrb(self) -> np.ndarray:
+        cx, cy, w, h = self._x[:, 0], self._x[:, 1], self._x[:, 2], self._x[:, 3]
+        return np.column_stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+    def _noise(self, scale: np.ndarray, pos: float, vel: float) -> np.ndarray:
+        """Per-track diagonal noise proportional to box height (as in DeepSORT)."""
+        std = np.concatenate([np.full(4, pos), np.full(4, vel)])
+        std = std[None, :] * scale[:, None]
+        std[:, 2:4] = np.maximum(std[:, 2:4], 1e-2)
+        return np.einsum("ni,ij->nij", std ** 2, np.eye(8))
+
+    def _predict(self) -> None:
+        if not len(self):
+            return
+        F = self._F
+        self._x = self._x @ F.T
+        self._x[:, 2:4] = np.maximum(self._x[:, 2:4], 1.0)
+        Q = self._noise(self._x[:, 3], 1 / 20, 1 / 160)
+        self._P = F @ self._P @ F.T + Q
+        self._age += 1
+
+    def _correct(self, idx: np.ndarray, z: np.ndarray) -> None:
+        P = self._P[idx]
+        R = self._noise(self._x[idx, 3], 1 / 20, 0)[:, :4, :4]
+        S = P[:, :4, :4] + R
+        K = P[:, :, :4] @ np.linalg.inv(S)
+        innovation = z - self._x[idx, :4]
+        self._x[idx] += np.einsum("nij,nj->ni", K, innovation)
+        self._P[idx] = P - K @ P[:, :4, :]
+        self._hits[idx] += 1
+        self._age[idx] = 0
+
+    def _spawn(self, z: np.ndarray, conf: np.ndarray) -> None:
+        n = len(z)
+        if not n:
+            return
+        x = np.hstack([z, np.zeros((n, 4))])
+        std = np.array([2 / 20, 2 / 20, 2 / 20, 2 / 20, 10 / 160, 10 / 160, 10 / 160, 10 / 160])
+        P = np.einsum("ni,ij->nij", (std[None, :] * z[:, 3:4]) ** 2, np.eye(8))
+        self._x = np.vstack([self._x, x])
+        self._P = np.concatenate([self._P, P])
+        self._ids.extend(str(self._next_id + i) for i in range(n))
+        self._next_id += n
+        self._hits = np.concatenate([self._hits, np.ones(n, dtype=np.int64)])
+        self._age = np.concatenate([self._age, np.zeros(n, dtype=np.int64)])
+        self._conf = np.concatenate([self._conf, conf])
+
+    def _prune(self) -> None:
+        keep = self._age <= self.max_age
+        # Tentative tracks that missed a frame are dropped straight away.
+        keep &= ~((self._hits < self.n_init) & (self._age > 0))
+        if keep.all():
+            return
+        self._x, self._P = self._x[keep], self._P[keep]
+        self._hits, self._age, self._conf = self._hits[keep], self._age[keep], self._conf[keep]
+        self._ids = [tid for tid, k in zip(self._ids, keep) if k]
+
+    def update(self, detections: Sequence[Detection], frame: Optional[np.ndarray] = None) -> List[Track]:
+        """Advance one frame; ``frame`` is accepted for API parity and ignored."""
+        if detections:
+            ltwh = np.asarray([d[0] for d in detections], dtype=np.float64).reshape(-1, 4)
+            conf = np.asarray([d[1] for d in detections], dtype=np.float64)
+        else:
+            ltwh, conf = np.zeros((0, 4)), np.zeros(0)
+        z = self._ltwh_to_z(ltwh)
+        det_ltrb = np.column_stack([ltwh[:, :2], ltwh[:, :2] + ltwh[:, 2:]])
+
+        self._predict()
+        self._conf[:] = np.nan
+
+        # First pass: confident detections against every track.
+        high = np.nonzero(conf >= self.high_conf)[0]
+        low = np.nonzero((conf >= self.low_conf) & (conf < self.high_conf))[0]
+        tracks = np.arange(len(self))
+        rows, cols = greedy_match(iou_matrix(self._ltrb(), det_ltrb[high]), self.iou_threshold)
+        matched_tracks, matched_dets = tracks[rows], high[cols]
+
+        # Second pass (ByteTrack): weak detections only extend leftover tracks.
+        leftover = np.setdiff1d(tracks, matched_tracks)
+        rows, cols = greedy_match(iou_matrix(self._ltrb()[leftover], det_ltrb[low]), self.iou_threshold)
+        matched_tracks = np.concatenate([matched_tracks, leftover[rows]])
+        matched_dets = np.concatenate([matched_dets, low[cols]])
+
+        if len(matched_tracks):
+            self._correct(matched_tracks, z[matched_dets])
+            self._conf[matched_tracks] = conf[matched_dets]
+
+        self._prune()
+        self._spawn(z[np.setdiff1d(high, matched_dets)], conf[np.setdiff1d(high, matched_dets)])
+        return self.tracks()
+
+    # DeepSORT-compatible alias so existing call sites keep working.
+    update_tracks = update
+
+    def tracks(self) -> List[Track]:
+        ltrb = self._ltrb()
+        ltwh = np.column_stack([ltrb[:, :2], ltrb[:, 2:] - ltrb[:, :2]])
+        confirmed = self._hits >= self.n_init
+        return [
+            Track(tid, ltwh[i], bool(confirmed[i]), None if np.isnan(self._conf[i]) else float(self._conf[i]))
+            for i, tid in enumerate(self._ids)
+        ]
+
+
+class DeepSortTracker:
+    """Adapter around ``deep_sort_realtime`` with the same ``update`` signature."""
+
+    def __init__(self, max_age: int = 30, max_iou_distance: float = 0.3, **kwargs):
+        from deep_sort_realtime.deepsort_tracker import DeepSort
+        self._tracker = DeepSort(max_age=max_age, max_iou_distance=max_iou_distance, **kwargs)
+
+    def update(self, detections: Sequence[Detection], frame: Optional[np.ndarray] = None):
+        return self._tracker.update_tracks(list(detections), frame=frame)
+
+    update_tracks = update
+
+
+TRACKERS = {
+    "deepsort": DeepSortTracker,
+    "iou": IouKalmanTracker,
+}
+
+
+def create_tracker(name: Optional[str] = None, **kwargs):
+    """Build a tracker by name (``deepsort`` or ``iou``); defaults to ``TRACKER_BACKEND``."""
+    name = (name or DEFAULT_TRACKER).lower()
+    if name not in TRACKERS:
+        raise ValueError(f"Unknown tracker backend '{name}'. Choose from: {', '.join(TRACKERS)}")
+    return TRACKERS[name](**kwargs)
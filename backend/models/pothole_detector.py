@@ -1,10 +1,15 @@
 import cv2
+import itertools
 import numpy as np
 from tensorflow.keras.models import load_model
 import os
 
+from inference.calibration import severity_of
+from inference.engine import KerasDetector, iter_frames
+from inference.localization import locate_regions
+
 class PotholeDetector:
-    def __init__(self):
+    def __init__(self, gps_track=None, fps=30.0):
         self.model_path = os.path.join(os.path.dirname(__file__), '../ml_models/pothole_detection_model.h5')
         self.dimension_model_path = os.path.join(os.path.dirname(__file__), '../ml_models/dimension_estimation_model.h5')
         
@@ -15,13 +20,27 @@ class PotholeDetector:
         # Define constants for dimension estimation
         self.CAMERA_HEIGHT = 1.5  # meters
         self.FOCAL_LENGTH = 1000  # pixels
+        self.SEVERITY_THRESHOLDS = (0.2, 0.5)  # medium/high volume, cubic meters
+
+        # Optional inference.geo.GpsTrack for per-frame locations
+        self.gps_track = gps_track
+        self.fps = fps
         
     def preprocess_frame(self, frame):
         # Resize frame to model input size
         resized = cv2.resize(frame, (224, 224))
         # Normalize pixel values
-        normalized = resized / 255.0
+        normalized = np.multiply(resized, 1.0 / 255.0, dtype=np.float32)
         return normalized
+
+    def preprocess_frames(self, frames, size=(224, 224), out=None):
+        # Resize every frame straight into one float32 batch and normalize in place
+        if out is None:
+            out = np.empty((len(frames), size[1], size[0], 3), dtype=np.float32)
+        for i, frame in enumerate(frames):
+            out[i] = cv2.resize(frame, size)
+        out *= 1.0 / 255.0
+        return out
         
     def detect_potholes(self, frame):
         processed_frame = self.preprocess_frame(frame)
@@ -35,77 +54,125 @@ class PotholeDetector:
         
         # Preprocess region for dimension model
         processed_region = cv2.resize(pothole_region, (128, 128))
-        normalized_region = processed_region / 255.0
+        normalized_region = np.multiply(processed_region, 1.0 / 255.0, dtype=np.float32)
         
         # Get dimension predictions
         dimensions = self.dimension_model.predict(np.expand_dims(normalized_region, axis=0))
         
-        # Convert pixel dimensions to real-world measurements (meters)
-        real_width = (dimensions[0][0] * w * self.CAMERA_HEIGHT) / self.FOCAL_LENGTH
-        real_length = (dimensions[0][1] * h * self.CAMERA_HEIGHT) / self.FOCAL_LENGTH
-        depth = dimensions[0][2]  # Assuming model predicts depth directly
-        
-        return {
-            'width': float(real_width),
-            'length': float(real_length),
-            'depth': float(depth)
-        }
-        
-    def process_video(self, frames):
+        return self.dimensions_from_predictions(dimensions, [bbox])[0]
+
+    def dimensions_from_predictions(self, dimensions, bboxes):
+        # Convert pixel dimensions to real-world measurements (meters) for a batch of crops
+        dimensions = np.asarray(dimensions, dtype=np.float64).reshape(len(bboxes), -1)
+        sizes = np.asarray([(w, h) for _, _, w, h in bboxes], dtype=np.float64).reshape(-1, 2)
+        real_width = (dimensions[:, 0] * sizes[:, 0] * self.CAMERA_HEIGHT) / self.FOCAL_LENGTH
+        real_length = (dimensions[:, 1] * sizes[:, 1] * self.CAMERA_HEIGHT) / self.FOCAL_LENGTH
+        depth = dimensions[:, 2]  # Assuming model predicts depth directly
+
+        return [
+            {'width': float(rw), 'length': float(rl), 'depth': float(d)}
+            for rw, rl, d in zip(real_width, real_length, depth)
+        ]
+
+    def locate_potholes(self, frame):
+        # Bright-region localisation on a downscaled frame, boxes in full-resolution (x, y, w, h)
+        # Note: This is a simplified version. You should use your actual object detection logic
+        return [tuple(bbox) for bbox in locate_regions(frame).tolist()]
+
+    def iter_video(self, source, chunk_size=32):
+        """Yield one result per frame, processing ``chunk_size`` frames at a time.
+
+        ``source`` is a video path or any iterable of BGR frames. Only one
+        chunk of frames is held at once, and the float32 model inputs are
+        written into buffers reused across chunks, so memory does not grow
+        with the clip length. Each chunk costs one detection and at most one
+        dimension ``predict`` call.
+        """
+        frame_batch = np.empty((chunk_size, 224, 224, 3), dtype=np.float32)
+        crop_batch = np.empty((0, 128, 128, 3), dtype=np.float32)
+        frames = iter_frames(source)
+        chunk_start = 0
+
+        while True:
+            chunk = list(itertools.islice(frames, chunk_size))
+            if not chunk:
+                return
+
+            batch = self.preprocess_frames(chunk, out=frame_batch[:len(chunk)])
+            predictions = self.detection_model.predict(batch, batch_size=len(chunk), verbose=0)
+            detected = np.asarray(predictions).reshape(len(chunk), -1)[:, 0] > 0.5  # Assuming binary classification threshold
+
+            located = []
+            for i in np.flatnonzero(detected):
+                located.extend((int(i), bbox) for bbox in self.locate_potholes(chunk[i]))
+
+            all_dimensions = []
+            if located:
+                if len(located) > len(crop_batch):
+                    crop_batch = np.empty((max(len(located), 2 * len(crop_batch)), 128, 128, 3), dtype=np.float32)
+                crops = crop_batch[:len(located)]
+                for j, (i, (x, y, w, h)) in enumerate(located):
+                    crops[j] = cv2.resize(chunk[i][y:y+h, x:x+w], (128, 128))
+                crops *= 1.0 / 255.0
+                dimensions = self.dimension_model.predict(crops, batch_size=len(located), verbose=0)
+                all_dimensions = self.dimensions_from_predictions(dimensions, [bbox for _, bbox in located])
+
+            details = [[] for _ in chunk]
+            for (i, bbox), dims in zip(located, all_dimensions):
+                frame_idx = chunk_start + i
+                details[i].append({
+                    'frame_index': frame_idx,
+                    'bbox': list(bbox),
+                    'dimensions': dims,
+                    'severity': self.calculate_severity(dims),
+                    'location': self.get_frame_location(frame_idx)
+                })
+
+            for i in range(len(chunk)):
+                yield {
+                    'frame_index': chunk_start + i,
+                    'pothole_detected': bool(detected[i]),
+                    'pothole_details': details[i]
+                }
+            chunk_start += len(chunk)
+
+    def process_video(self, source, chunk_size=32):
         results = {
             'potholes_detected': 0,
             'frames_with_potholes': [],
             'pothole_details': []
         }
-        
-        for frame_idx, frame in enumerate(frames):
-            # Detect potholes in frame
-            predictions = self.detect_potholes(frame)
-            
-            if predictions > 0.5:  # Assuming binary classification threshold
+
+        for frame_result in self.iter_video(source, chunk_size):
+            if frame_result['pothole_detected']:
                 results['potholes_detected'] += 1
-                results['frames_with_potholes'].append(frame_idx)
-                
-                # Perform object detection to get bounding box
-                # Note: This is a simplified version. You should use your actual object detection logic
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                blurred = cv2.GaussianBlur(gray, (11, 11), 0)
-                thresh = cv2.threshold(blurred, 60, 255, cv2.THRESH_BINARY)[1]
-                contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                
-                for contour in contours:
-                    if cv2.contourArea(contour) > 500:  # Minimum area threshold
-                        bbox = cv2.boundingRect(contour)
-                        dimensions = self.estimate_dimensions(frame, bbox)
-                        
-                        severity = self.calculate_severity(dimensions)
-                        
-                        pothole_info = {
-                            'frame_index': frame_idx,
-                            'bbox': list(bbox),
-                            'dimensions': dimensions,
-                            'severity': severity,
-                            'location': self.get_frame_location(frame_idx)  # You'll need to implement this based on your needs
-                        }
-                        results['pothole_details'].append(pothole_info)
-        
+                results['frames_with_potholes'].append(frame_result['frame_index'])
+                results['pothole_details'].extend(frame_result['pothole_details'])
+
         return results
+
+    def process_video_batched(self, frames):
+        # The whole list as one chunk: one predict call per model
+        return self.process_video(frames, chunk_size=max(len(frames), 1))
     
+    def as_detector(self, threshold=0.5):
+        # Detector backend for inference.engine.InferenceEngine (calibrated size + MiDaS depth)
+        return KerasDetector(self, threshold)
+
     def calculate_severity(self, dimensions):
-        # Simple severity calculation based on dimensions
+        # Simple severity calculation based on dimensions, same helper as the YOLO pipeline
         volume = dimensions['width'] * dimensions['length'] * dimensions['depth']
-        
-        if volume > 0.5:  # cubic meters
-            return 'high'
-        elif volume > 0.2:
-            return 'medium'
-        else:
-            return 'low'
+        return severity_of([volume], self.SEVERITY_THRESHOLDS)[0]
             
     def get_frame_location(self, frame_idx):
-        # This should be implemented based on your video metadata or GPS data
-        # Returning dummy coordinates for now
+        # Interpolated from the GPS track; 0, 0 when the video has none
+        if self.gps_track is None:
+            return {
+                'latitude': 0.0,
+                'longitude': 0.0
+            }
+        latitude, longitude = self.gps_track.locate_frames(frame_idx, self.fps)
         return {
-            'latitude': 0.0,
-            'longitude': 0.0
+            'latitude': float(latitude),
+            'longitude': float(longitude)
         } 
\ No newline at end of file
@@ -0,0 +1,33 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+# Tests run from backend/ or the repository root; the inference package lives in backend/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference.calibration import load_profiles  # noqa: E402
+from inference.synthetic import synthetic_clip  # noqa: E402
+
+PROFILES = load_profiles()
+TRACKERS = [
+    "iou",
+    pytest.param("deepsort", marks=pytest.mark.skipif(
+        importlib.util.find_spec("deep_sort_realtime") is None, reason="deep-sort-realtime not installed")),
+]
+
+
+@pytest.fixture(params=sorted(PROFILES))
+def profile(request):
+    return PROFILES[request.param]
+
+
+@pytest.fixture(params=TRACKERS)
+def tracker(request):
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def clip():
+    return synthetic_clip(30)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from inference.calibration import CameraProfile, remeasure
+
+FLAT = CameraProfile("flat", fx=1000, cx=960, cy=540, image_size=(1920, 1080), height_m=1.5)
+
+
+def test_legacy_profile_scales_pixels():
+    length, breadth = CameraProfile("legacy", pixel_scale=0.5).measure(np.array([[10, 20, 110, 60]]))
+    np.testing.assert_allclose(length, [50])
+    np.testing.assert_allclose(breadth, [20])
+
+
+def test_ground_points_on_a_level_camera():
+    # 100 px below the principal point: ray slope 0.1, so the road is 1.5 / 0.1 m ahead.
+    points = FLAT.ground_points([[960, 640], [1060, 640], [960, 540]])
+    np.testing.assert_allclose(points[:2], [[0, 15], [1.5, 15]])
+    assert np.isnan(points[2]).all()
+
+
+def test_measure_follows_perspective():
+    # The same 100x20 px box is wider and deeper on the road the closer it is to the horizon.
+    near, far = np.array([[910, 980, 1010, 1000]]), np.array([[910, 600, 1010, 620]])
+    near_length, near_breadth = FLAT.measure(near)
+    far_length, far_breadth = FLAT.measure(far)
+    assert far_length[0] > near_length[0] > 0
+    assert far_breadth[0] > near_breadth[0] > 0
+    # A box reaching above the horizon measures 0 rather than NaN.
+    assert FLAT.measure(np.array([[910, 500, 1010, 620]]))[1][0] == 0
+
+
+def test_measure_rescales_intrinsics_to_the_frame():
+    box = np.array([[900, 700, 1100, 900]])
+    full = FLAT.measure(box, (1920, 1080))
+    half = FLAT.measure(box / 2, (960, 540))
+    np.testing.assert_allclose(half, full)
+
+
+def test_remeasure_groups_by_stored_frame_size():
+    records = [{'bbox': [900, 700, 1100, 900], 'raw_depth': 3000.0, 'frame_size': [1920, 1080]},
+               {'bbox': [450, 350, 550, 450], 'raw_depth': 3000.0, 'frame_size': [960, 540]},
+               {'length': 1.0}]
+    remeasure(records[:2], FLAT)
+    assert records[0]['length'] == pytest.approx(records[1]['length'])
+    assert records[0]['depth'] == pytest.approx(3.0)
+    assert records[0]['volume'] == pytest.approx(records[0]['length'] * records[0]['breadth'] * 3.0)
+    assert remeasure(records[2:], FLAT) == [{'length': 1.0}]
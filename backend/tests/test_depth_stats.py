@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from inference.depth_stats import TrackDepthStats, sample_box_depths
+
+
+def feed(stats, key, samples):
+    for sample in samples:
+        out = stats.update([key], np.array([sample], dtype=np.float32))
+    return float(out[0])
+
+
+@pytest.mark.parametrize("aggregation, expected", [
+    ("topk_mean", (9 + 8 + 7) / 3),
+    ("max", 9.0),
+    ("median", 5.0),
+    ("percentile", np.percentile(np.arange(1, 10), 90)),
+])
+def test_aggregations(aggregation, expected):
+    stats = TrackDepthStats(aggregation, k=3, percentile=90)
+    samples = [3, 9, 1, 7, np.nan, 5, 2, 8, 4, 6]
+    assert feed(stats, "a", samples) == pytest.approx(expected, rel=1e-6)
+
+
+def test_rolling_window_forgets_old_samples():
+    stats = TrackDepthStats("median", window=3)
+    assert feed(stats, "a", [100, 100, 100, 1, 2, 3]) == pytest.approx(2.0)
+
+
+def test_tracks_without_valid_samples_report_zero():
+    stats = TrackDepthStats("max")
+    assert stats.update(["a"], np.array([np.nan], dtype=np.float32))[0] == 0
+    assert stats.get(["unknown"])[0] == 0
+
+
+def test_growth_keeps_existing_tracks():
+    stats = TrackDepthStats("max", max_tracks=1024)
+    keys = [f"t{i}" for i in range(200)]
+    stats.update(keys, np.arange(200, dtype=np.float32))
+    np.testing.assert_array_equal(stats.get(keys), np.arange(200))
+
+
+def test_eviction_never_picks_a_track_from_the_same_update():
+    stats = TrackDepthStats("max", max_tracks=64)
+    stats.update([f"k{i}" for i in range(64)], np.arange(64, dtype=np.float32))
+    np.testing.assert_array_equal(stats.update(["x", "y"], np.array([10, 50], dtype=np.float32)), [10, 50])
+    assert "x" in stats and "y" in stats and len(stats) == 64
+    with pytest.raises(ValueError):
+        stats.update([f"z{i}" for i in range(65)], np.ones(65, dtype=np.float32))
+
+
+def test_retain_and_drop_release_rows():
+    stats = TrackDepthStats("max")
+    stats.update(["a", "b", "c"], np.array([1, 2, 3], dtype=np.float32))
+    stats.retain(["b", "c"])
+    stats.drop(["c"])
+    assert "a" not in stats and "c" not in stats and len(stats) == 1
+    # A reused row starts empty.
+    assert stats.update(["d"], np.array([np.nan], dtype=np.float32))[0] == 0
+
+
+def test_sample_box_depths():
+    depth = np.zeros((10, 10), dtype=np.float32)
+    depth[2:4, 2:4] = 5
+    boxes = np.array([[0, 0, 5, 5], [6, 6, 9, 9], [8, 8, 8, 9], [-5, -5, 3, 3]])
+    np.testing.assert_array_equal(sample_box_depths(depth, boxes), [5, np.nan, np.nan, 5])
@@ -0,0 +1,39 @@
+import pytest
+
+from inference.adapters import video_engine
+from inference.depth_stats import TrackDepthStats
+from inference.detection_log import DetectionLog, merge_rescored, rescore_log
+from inference.synthetic import BlobDetector, IntensityDepth
+
+
+def test_rescore_keeps_location_and_frame_range(profile, clip):
+    log = DetectionLog(type='video', camera=profile.name)
+    stored = video_engine(BlobDetector(), profile, IntensityDepth(), "iou").run_video(clip, log)
+    assert stored
+    for i, pothole in enumerate(stored):
+        pothole['location'] = {'latitude': 19.0 + i, 'longitude': 72.8}
+        pothole['pothole_id'] = f'p{i}'
+
+    rescored = rescore_log(log.to_array(), log.meta, profile)
+    merged = merge_rescored(stored, rescored)
+
+    assert [p['id'] for p in merged] == [p['id'] for p in stored]
+    for before, after in zip(stored, merged):
+        for field in ('location', 'pothole_id', 'frame', 'last_frame', 'severity'):
+            assert after[field] == before[field], field
+
+
+@pytest.mark.parametrize("aggregation", ["median", "max", "percentile"])
+def test_rescore_matches_live_aggregation(profile, clip, aggregation):
+    stats = TrackDepthStats(aggregation)
+    engine = video_engine(BlobDetector(), profile, IntensityDepth(), "iou", depth_stats=stats)
+    assert engine.depth_stats is stats
+    log = DetectionLog(type='video', camera=profile.name)
+    live = engine.run_video(clip, log)
+    assert live
+
+    rescored = rescore_log(log.to_array(), log.meta, profile, aggregation=aggregation)
+    assert [p['id'] for p in rescored] == [p['id'] for p in live]
+    for before, after in zip(live, rescored):
+        assert after['raw_depth'] == pytest.approx(before['raw_depth'], rel=1e-6)
+        assert after['depth'] == pytest.approx(before['depth'], rel=1e-6)
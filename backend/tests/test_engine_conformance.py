@@ -0,0 +1,172 @@
+"""Every entry point gives the same potholes for the same input.
+
+Detector and depth are the weight-free backends from ``inference.synthetic``;
+the code under test is what the services run: ``analyze_video`` /
+``analyze_image`` behind ``app.py`` and ``StreamSession`` behind
+``src/estimate.py``.
+"""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from inference.adapters import StreamSession, analyze_image, analyze_video, video_engine
+from inference.engine import KerasDetector, iter_frames
+from inference.synthetic import BlobDetector, IntensityDepth
+
+VIDEO_FIELDS = ('id', 'length', 'breadth', 'depth')
+
+
+def reference_image(detector, depth, profile, frame):
+    """The original single-image loop, one box at a time."""
+    depth_map = depth.depth_map(frame)
+    boxes, confidences = detector.detect(frame)
+    frame_size = [frame.shape[1], frame.shape[0]]
+    potholes = []
+    for (x1, y1, x2, y2), conf in zip(np.asarray(boxes).astype(int), confidences):
+        roi = depth_map[max(y1, 0):y2, max(x1, 0):x2]
+        positive = roi[roi > 0]
+        raw_depth = float(positive.max()) if positive.size else 0.0
+        lengths, breadths = profile.measure(np.array([[x1, y1, x2, y2]]), frame_size)
+        depth_cm = float(profile.depth(np.array([raw_depth]))[0])
+        potholes.append({
+            'id': len(potholes) + 1,
+            'length': float(lengths[0]),
+            'breadth': float(breadths[0]),
+            'depth': depth_cm,
+            'volume': float(lengths[0] * breadths[0] * depth_cm),
+            'confidence': float(conf),
+        })
+    return potholes
+
+
+def stream_records(session, frames):
+    """Run frames through a StreamSession the way estimate.py does; records sorted by global ID."""
+    for frame in frames:
+        session.record(session.engine.process_frame(frame, skip_empty=True))
+    return [{'id': unique_id, 'length': l, 'breadth': b, 'depth': d}
+            for unique_id, (l, b, d) in sorted(session.flush().items())]
+
+
+def assert_records_equal(expected, actual, fields, rtol=1e-6):
+    assert len(expected) == len(actual)
+    for a, b in zip(expected, actual):
+        for field in fields:
+            assert a[field] == pytest.approx(b[field], rel=rtol, abs=1e-9), field
+
+
+def write_video(path, frames, fps=30):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def test_image_adapter_matches_per_box_reference(tmp_path, profile, clip):
+    detector, depth = BlobDetector(), IntensityDepth()
+    for i, frame in enumerate(clip[::5]):
+        path = str(tmp_path / f"frame{i}.png")
+        cv2.imwrite(path, frame)
+        potholes, error = analyze_image(detector, depth, profile, path)
+        assert error is None
+        assert potholes
+        assert_records_equal(reference_image(detector, depth, profile, frame), potholes,
+                             ('id', 'length', 'breadth', 'depth', 'volume', 'confidence'))
+
+
+def test_image_adapter_reports_unreadable_file(tmp_path, profile):
+    potholes, error = analyze_image(BlobDetector(), IntensityDepth(), profile, str(tmp_path / "missing.png"))
+    assert potholes is None and error
+
+
+def test_video_adapter_matches_stream_session(tmp_path, profile, tracker, clip):
+    path = write_video(tmp_path / "clip.avi", clip)
+    detector, depth = BlobDetector(), IntensityDepth()
+
+    potholes, error = analyze_video(detector, depth, profile, path, tracker=tracker)
+    assert error is None
+    assert potholes
+
+    session = StreamSession(video_engine(detector, profile, depth, tracker))
+    assert_records_equal(stream_records(session, iter_frames(path)), potholes, VIDEO_FIELDS, rtol=0)
+
+
+def test_video_adapter_reports_unreadable_file(tmp_path, profile):
+    potholes, error = analyze_video(BlobDetector(), IntensityDepth(), profile, str(tmp_path / "missing.avi"),
+                                    tracker="iou")
+    assert potholes is None and error
+
+
+def test_blackout_frame_resets_stream(profile, tracker, clip):
+    detector, depth = BlobDetector(), IntensityDepth()
+    before, after = clip[:15], clip[15:]
+    blank = np.zeros_like(clip[0])
+
+    session = StreamSession(video_engine(detector, profile, depth, tracker))
+    first_pass = stream_records(StreamSession(video_engine(detector, profile, depth, tracker)), before)
+    for frame in before:
+        session.record(session.engine.process_frame(frame, skip_empty=True))
+    old_tracker = session.engine.tracker
+
+    assert session.record(session.engine.process_frame(blank, skip_empty=True)) is None
+    assert session.engine.tracker is not old_tracker
+    assert len(session.engine.depth_stats) == 0
+    assert session.current == {}
+    assert_records_equal(first_pass, [{'id': k, 'length': l, 'breadth': b, 'depth': d}
+                                      for k, (l, b, d) in sorted(session.finished.items())], VIDEO_FIELDS, rtol=0)
+
+    # After the reset the clip is measured as if it started there: same per-frame
+    # measurements as a fresh session, and finished potholes keep their first values.
+    fresh = StreamSession(video_engine(detector, profile, depth, tracker))
+    for frame in after:
+        expected = fresh.record(fresh.engine.process_frame(frame, skip_empty=True))
+        actual = session.record(session.engine.process_frame(frame, skip_empty=True))
+        assert [m for _, m in expected.values()] == [m for _, m in actual.values()]
+    finished = session.flush()
+    for record in first_pass:
+        assert finished[record['id']] == (record['length'], record['breadth'], record['depth'])
+
+
+class CountingDepth(IntensityDepth):
+    def __init__(self):
+        self.calls = 0
+
+    def depth_map(self, frame):
+        self.calls += 1
+        return super().depth_map(frame)
+
+
+def test_blackout_frame_skips_tracking_and_depth(profile, tracker, clip):
+    depth = CountingDepth()
+    session = StreamSession(video_engine(BlobDetector(), profile, depth, tracker))
+    for frame in clip[:10]:
+        session.record(session.engine.process_frame(frame, skip_empty=True))
+    assert session.current
+    calls = depth.calls
+    session.engine.tracker.update_tracks = None  # fails if the blank frame reaches the tracker
+
+    result = session.engine.process_frame(np.zeros_like(clip[0]), skip_empty=True)
+    assert result.detections == 0 and not result.keys
+    assert depth.calls == calls
+    assert session.record(result) is None
+
+
+def test_keras_detector_matches_pothole_detector(clip):
+    pytest.importorskip("tensorflow")
+    models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml_models")
+    if not os.path.exists(os.path.join(models_dir, "pothole_detection_model.h5")):
+        pytest.skip("Keras models not available")
+    from models.pothole_detector import PotholeDetector
+
+    pothole_detector = PotholeDetector()
+    expected = {}
+    for detail in pothole_detector.process_video(clip)['pothole_details']:
+        expected.setdefault(detail['frame_index'], []).append(detail['bbox'])
+    detector = KerasDetector(pothole_detector)
+    for i, frame in enumerate(clip):
+        boxes, _ = detector.detect(frame)
+        ltwh = [[x1, y1, x2 - x1, y2 - y1] for x1, y1, x2, y2 in boxes.astype(int).tolist()]
+        assert ltwh == expected.get(i, [])
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from inference.calibration import CameraProfile
+from inference.geo import METERS_PER_DEGREE, GpsTrack, haversine_m, load_track, locate_potholes, parse_bbox
+
+
+def test_parse_bbox():
+    assert parse_bbox("72.8,19.0,72.9,19.1") == (72.8, 19.0, 72.9, 19.1)
+
+
+@pytest.mark.parametrize("text", [
+    "", "1,2,3", "a,b,c,d", "72.9,19.0,72.8,19.1", "72.8,19.1,72.9,19.0",
+    "-181,0,10,10", "0,-91,10,10", "0,0,10,91", "nan,0,10,10",
+    "-180,0,180,10", "-100,0,100,10",
+])
+def test_parse_bbox_rejects_invalid_boxes(text):
+    with pytest.raises(ValueError):
+        parse_bbox(text)
+
+
+def test_parse_bbox_accepts_half_the_globe():
+    assert parse_bbox("-90,0,90,10") == (-90, 0, 90, 10)
+
+
+def test_gpx_point_without_coordinates_is_a_value_error(tmp_path):
+    path = tmp_path / "track.gpx"
+    path.write_text('<gpx><trk><trkseg><trkpt lat="19.0" lon="72.8"/><trkpt lat="19.1"/></trkseg></trk></gpx>')
+    with pytest.raises(ValueError):
+        load_track(str(path))
+
+
+def test_headings_follow_the_track_and_skip_stops():
+    # North, standing still, then east.
+    track = GpsTrack([0, 1, 2, 3], [19.0, 19.0001, 19.0001, 19.0001], [72.8, 72.8, 72.8, 72.8001])
+    np.testing.assert_allclose(track.headings([0.5, 1.5, 2.5]), [0, 0, np.pi / 2], atol=1e-3)
+    assert np.isnan(GpsTrack([0, 1], [19.0, 19.0], [72.8, 72.8]).headings([0.5])).all()
+
+
+def test_potholes_are_placed_on_the_road_with_a_calibrated_camera():
+    profile = CameraProfile("flat", fx=1000, cx=960, cy=540, image_size=(1920, 1080), height_m=1.5)
+    track = GpsTrack([0, 10], [19.0, 19.001], [72.8, 72.8])  # heading north
+    # Bottom edge 100 px below the horizon: 15 m ahead, bottom-centre 1.5 m left / right.
+    left = {'bbox': [800, 620, 920, 640], 'frame_size': [1920, 1080], 'frame': 0, 'last_frame': 30}
+    right = {'bbox': [1000, 620, 1120, 640], 'frame_size': [1920, 1080], 'frame': 0, 'last_frame': 30}
+    locate_potholes([left, right], track, fps=30, profile=profile)
+
+    ahead = [(p['location']['latitude'] - 19.0) * METERS_PER_DEGREE for p in (left, right)]
+    assert ahead[0] == pytest.approx(ahead[1]) and 15 < ahead[0] < 20
+    across = haversine_m(left['location']['latitude'], left['location']['longitude'],
+                         right['location']['latitude'], right['location']['longitude'])
+    assert 2 < across < 4
+    assert left['location']['longitude'] < 72.8 < right['location']['longitude']
+
+
+def test_potholes_without_calibration_take_the_vehicle_position():
+    track = GpsTrack([0, 10], [19.0, 19.001], [72.8, 72.8])
+    pothole = {'bbox': [800, 620, 920, 640], 'frame_size': [1920, 1080], 'frame': 0, 'last_frame': 150}
+    locate_potholes([pothole], track, fps=30, profile=CameraProfile("legacy"))
+    assert pothole['location'] == {'latitude': pytest.approx(19.0005), 'longitude': pytest.approx(72.8)}
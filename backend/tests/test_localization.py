@@ -0,0 +1,23 @@
+import cv2
+import numpy as np
+
+from inference.localization import locate_contours, locate_regions
+
+
+def test_regions_match_contours_unless_frame_is_twice_max_width(clip):
+    for frame in clip[::10]:
+        large = cv2.resize(frame, (1280, 720), interpolation=cv2.INTER_NEAREST)
+        expected = locate_contours(large)
+        assert len(expected)
+        np.testing.assert_array_equal(locate_regions(large, max_width=0), expected)
+        np.testing.assert_array_equal(locate_regions(large, max_width=960), expected)
+
+
+def test_downscaled_regions_map_back_to_full_resolution(clip):
+    frame = cv2.resize(clip[0], (3840, 2160), interpolation=cv2.INTER_NEAREST)
+    expected = locate_contours(frame)
+    found = locate_regions(frame, max_width=960)
+    assert len(found) == len(expected)
+    for box in expected:
+        # Every reference box has a downscaled box within a few full-resolution pixels.
+        assert np.abs(found - box).max(axis=1).min() <= 8
@@ -0,0 +1,119 @@
+"""PotholeStore against a stub collection implementing the queries it uses."""
+import pytest
+
+pytest.importorskip("pymongo")
+
+from bson import ObjectId  # noqa: E402
+
+from inference.geo import haversine_m  # noqa: E402
+from inference.pothole_store import PotholeStore, box_polygon  # noqa: E402
+
+
+class StubCursor(list):
+    def sort(self, key, direction):
+        return StubCursor(sorted(self, key=lambda doc: doc.get(key, 0), reverse=direction < 0))
+
+    def limit(self, n):
+        return StubCursor(self[:n])
+
+
+class StubCollection:
+    """The subset of a pymongo collection PotholeStore needs, with 2dsphere queries done in Python."""
+
+    def __init__(self):
+        self.docs = {}
+        self.queries = 0
+
+    def create_index(self, keys):
+        pass
+
+    def find(self, query, projection=None):
+        self.queries += 1
+        docs = list(self.docs.values())
+        near = query.get('location', {}).get('$nearSphere')
+        if near:
+            lon, lat = near['$geometry']['coordinates']
+            found = [(float(haversine_m(lat, lon, d['location']['coordinates'][1], d['location']['coordinates'][0])), d)
+                     for d in docs]
+            docs = [d for distance, d in sorted(found, key=lambda f: f[0]) if distance <= near['$maxDistance']]
+        within = query.get('location', {}).get('$geoWithin')
+        if within:
+            ring = within['$geometry']['coordinates'][0]
+            lons, lats = [p[0] for p in ring], [p[1] for p in ring]
+            docs = [d for d in docs if min(lons) <= d['location']['coordinates'][0] <= max(lons)
+                    and min(lats) <= d['location']['coordinates'][1] <= max(lats)]
+        for axis in (0, 1):
+            bounds = query.get(f'location.coordinates.{axis}')
+            if bounds:
+                docs = [d for d in docs if bounds['$gte'] <= d['location']['coordinates'][axis] <= bounds['$lte']]
+        if 'observations' in query:
+            docs = [d for d in docs if d['observations'] >= query['observations']['$gte']]
+        return StubCursor(dict(d) for d in docs)
+
+    def bulk_write(self, operations, ordered=True):
+        for op in operations:
+            if hasattr(op, '_filter'):
+                self.docs[op._filter['_id']].update(op._doc['$set'])
+            else:
+                self.docs[op._doc['_id']] = dict(op._doc)
+
+
+def observation(lat, lon, volume=100.0):
+    return {'location': {'latitude': lat, 'longitude': lon}, 'length': 10.0, 'breadth': 10.0,
+            'depth': volume / 100, 'volume': volume}
+
+
+def test_merges_within_radius_across_and_within_uploads():
+    collection = StubCollection()
+    store = PotholeStore(collection, radius_m=3.0)
+    first = [observation(19.0, 72.8), observation(19.0, 72.8003)]  # ~32 m apart
+    assert store.add_observations(first) == {'created': 2, 'merged': 0}
+
+    # A second pass of the same road, seeing the first pothole twice.
+    second = [observation(19.00001, 72.8, 300.0), observation(19.0, 72.80001, 200.0), observation(19.1, 72.9)]
+    assert store.add_observations(second) == {'created': 1, 'merged': 2}
+    assert second[0]['pothole_id'] == second[1]['pothole_id'] == first[0]['pothole_id']
+    assert len(collection.docs) == 3
+
+    merged = collection.docs[ObjectId(first[0]['pothole_id'])]
+    assert merged['observations'] == 3
+    assert merged['volume'] == pytest.approx(200.0)
+    # One indexed query per observation.
+    assert collection.queries == len(first) + len(second)
+
+
+def test_side_by_side_potholes_stay_apart():
+    store = PotholeStore(StubCollection(), radius_m=3.0)
+    # 5 m apart across the lane, as placed by locate_potholes with a calibrated camera.
+    potholes = [observation(19.0, 72.8), observation(19.0, 72.8 + 5 / 105300)]
+    assert store.add_observations(potholes) == {'created': 2, 'merged': 0}
+
+
+def test_within_bbox_orders_by_observations():
+    store = PotholeStore(StubCollection(), radius_m=3.0)
+    store.add_observations([observation(19.0, 72.8), observation(19.05, 72.85)])
+    store.add_observations([observation(19.05, 72.85)])
+    found = store.within_bbox(72.7, 18.9, 72.9, 19.1)
+    assert [p['observations'] for p in found] == [2, 1]
+    assert [p['observations'] for p in store.within_bbox(72.7, 18.9, 72.9, 19.1, min_observations=2)] == [2]
+    assert store.within_bbox(73.0, 18.9, 73.1, 19.1) == []
+
+
+def test_within_bbox_keeps_exactly_the_box():
+    store = PotholeStore(StubCollection(), radius_m=3.0)
+    # Inside the query polygon's padding, but outside the box.
+    store.add_observations([observation(19.0, 72.8), observation(19.105, 72.85), observation(19.05, 72.905)])
+    assert [(p['latitude'], p['longitude']) for p in store.within_bbox(72.7, 18.9, 72.9, 19.1)] == [(19.0, 72.8)]
+
+
+@pytest.mark.parametrize("box", [(-180, 0, 180, 10), (-100, 0, 100, 10), (10, 0, 10, 5)])
+def test_within_bbox_rejects_boxes_wider_than_half_the_globe(box):
+    with pytest.raises(ValueError):
+        PotholeStore(StubCollection()).within_bbox(*box)
+
+
+def test_box_polygon_contains_the_box():
+    ring = box_polygon(-90, 40, 90, 50)['coordinates'][0]
+    assert ring[0] == ring[-1]
+    assert max(b[0] - a[0] for a, b in zip(ring, ring[1:]) if a[1] == b[1]) <= 1.0
+    assert min(lat for _, lat in ring) < 40 and max(lat for _, lat in ring) > 50
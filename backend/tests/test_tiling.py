@@ -0,0 +1,64 @@
+import numpy as np
+
+from inference.tiling import merge_boxes, tile_grid
+
+TILES = tile_grid(3840, 2160, 640, 0.2)
+
+
+def tile_at(x1, y1):
+    return int(np.flatnonzero((TILES[:, 0] == x1) & (TILES[:, 1] == y1))[0])
+
+
+def merge(detections):
+    boxes = np.array([d[0] for d in detections], dtype=np.float32)
+    scores = np.array([d[1] for d in detections], dtype=np.float32)
+    sources = np.array([d[2] for d in detections])
+    merged, merged_scores = merge_boxes(boxes, scores, 0.5, sources, TILES)
+    return sorted(zip(map(tuple, merged.tolist()), merged_scores.tolist()))
+
+
+def test_tile_grid_covers_the_frame_flush_with_the_edges():
+    assert TILES[:, 0].min() == 0 and TILES[:, 2].max() == 3840
+    assert TILES[:, 1].min() == 0 and TILES[:, 3].max() == 2160
+    assert ((TILES[:, 2] - TILES[:, 0]) == 640).all()
+
+
+def test_boxes_inside_a_whole_frame_box_are_not_grown():
+    inner = tile_at(1024, 1024)
+    small = [((1050, 1050, 1100, 1100), 0.8, inner),
+             ((1300, 1200, 1380, 1260), 0.7, inner),
+             ((1500, 1300, 1560, 1380), 0.6, inner)]
+    merged = merge([((1000, 1000, 1600, 1400), 0.5, -1)] + small)
+    expected = sorted([((1000, 1000, 1600, 1400), 0.5)] + [(box, score) for box, score, _ in small])
+    assert [box for box, _ in merged] == [box for box, _ in expected]
+    np.testing.assert_allclose([s for _, s in merged], [s for _, s in expected])
+
+
+def test_seam_cut_pothole_is_fused_and_duplicates_suppressed():
+    left, right = tile_at(512, 0), tile_at(1024, 0)  # overlap strip x in [1024, 1152]
+    merged = merge([
+        ((1100, 200, 1152, 260), 0.6, left),   # cut by the left tile's edge
+        ((1100, 202, 1250, 258), 0.9, right),
+        ((1030, 400, 1080, 440), 0.7, left),   # inside the strip, seen by both tiles
+        ((1031, 401, 1080, 441), 0.8, right),
+        ((1030, 500, 1060, 530), 0.7, left),   # neighbouring potholes in the strip stay apart
+        ((1062, 500, 1092, 530), 0.7, right),
+    ])
+    assert [box for box, _ in merged] == [(1030, 400, 1080, 441), (1030, 500, 1060, 530),
+                                          (1062, 500, 1092, 530), (1100, 200, 1250, 260)]
+
+
+def test_boxes_from_the_same_tile_are_only_suppressed_by_iou():
+    tile = tile_at(0, 0)
+    merged = merge([((100, 100, 200, 200), 0.9, tile), ((150, 100, 250, 200), 0.8, tile),
+                    ((105, 100, 205, 200), 0.7, tile)])
+    assert [box for box, _ in merged] == [(100, 100, 200, 200), (150, 100, 250, 200)]
+
+
+def test_merge_without_tiles_is_plain_nms():
+    boxes = np.array([[0, 0, 10, 10], [1, 0, 11, 10], [20, 20, 30, 30]], dtype=np.float32)
+    merged, scores = merge_boxes(boxes, np.array([0.5, 0.9, 0.4], dtype=np.float32))
+    np.testing.assert_array_equal(merged, [[1, 0, 11, 10], [20, 20, 30, 30]])
+    np.testing.assert_allclose(scores, [0.9, 0.4])
+    empty, empty_scores = merge_boxes(np.zeros((0, 4)), np.zeros(0))
+    assert empty.shape == (0, 4) and empty_scores.shape == (0,)
@@ -0,0 +1,55 @@
+import numpy as np
+
+from inference.trackers import IouKalmanTracker, create_tracker, iou_matrix
+
+
+def det(x, y, w=40, h=30, conf=0.9):
+    return ([x, y, w, h], conf, "pothole")
+
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10]], dtype=float)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=float)
+    np.testing.assert_allclose(iou_matrix(a, b), [[1.0, 50 / 150, 0.0]], rtol=1e-6)
+    assert iou_matrix(a, np.zeros((0, 4))).shape == (1, 0)
+
+
+def test_tracks_confirm_after_n_init_and_keep_their_ids():
+    tracker = IouKalmanTracker(n_init=3)
+    ids = []
+    for t in range(6):
+        tracks = tracker.update([det(100 + 3 * t, 50), det(300 - 2 * t, 200)])
+        assert len(tracks) == 2
+        assert all(track.is_confirmed() for track in tracks) == (t >= 2)
+        ids.append([track.track_id for track in tracks])
+    assert all(frame_ids == ids[0] for frame_ids in ids)
+    assert len(set(ids[0])) == 2
+
+
+def test_confirmed_track_coasts_then_is_deleted_after_max_age():
+    tracker = IouKalmanTracker(max_age=3, n_init=1)
+    track_id = tracker.update([det(100, 100)])[0].track_id
+    for _ in range(3):
+        tracks = tracker.update([])
+        assert [track.track_id for track in tracks] == [track_id]
+        assert tracks[0].det_conf is None
+    assert tracker.update([]) == []
+
+
+def test_tentative_track_is_dropped_on_first_miss():
+    tracker = IouKalmanTracker(n_init=3)
+    tracker.update([det(100, 100)])
+    assert tracker.update([]) == []
+
+
+def test_low_confidence_detections_extend_but_never_start_tracks():
+    tracker = IouKalmanTracker(n_init=1, high_conf=0.4, low_conf=0.1)
+    assert tracker.update([det(100, 100, conf=0.2)]) == []
+    track_id = tracker.update([det(100, 100)])[0].track_id
+    tracks = tracker.update([det(102, 100, conf=0.2)])
+    assert [track.track_id for track in tracks] == [track_id]
+    assert tracks[0].det_conf == 0.2
+
+
+def test_create_tracker_by_name():
+    assert isinstance(create_tracker("iou", max_age=5), IouKalmanTracker)